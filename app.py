@@ -1,10 +1,16 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-from src.researcher import scrape_website, search_news
-from src.analyzer import generate_brief
+from src.pipeline import run_research
+from src.analyzer import stream_brief
 from src.utils import extract_company_name
-from src.pdf_utils import extract_text_from_pdf
+from src.cache import normalize_domain_key
+from src.pdf_utils import extract_cv
+from src.compare import parse_company_urls, research_companies, compare_companies
+from src.jobs import get_queue, ensure_workers
+from src.monitor import state_key, load_state, needs_full_brief, record_brief, refresh_brief
+from src.warmup import start_warmup
+from src import metrics
 
 import time
 from datetime import datetime, timedelta
@@ -12,6 +18,96 @@ from datetime import datetime, timedelta
 # Load environment variables
 load_dotenv()
 
+# Serve /metrics for Prometheus when B2B_METRICS_PORT is set (no-op otherwise)
+metrics.start_metrics_server()
+
+# Research fetched in this session is reused for this long when only the mode
+# or the prompt inputs change. "Force fresh research" always refetches.
+SESSION_RESEARCH_TTL = int(os.getenv("B2B_SESSION_RESEARCH_TTL", 3600))
+
+# Background jobs listed under the form; older ones drop off the list.
+MAX_LISTED_JOBS = 20
+
+
+def research_key(url: str, crawl: bool) -> str:
+    return ("crawl:" if crawl else "") + normalize_domain_key(url)
+
+
+def session_research(url: str, crawl: bool):
+    """Returns this session's research bundle for the company if still fresh, else None."""
+    entry = st.session_state.get('research_by_company', {}).get(research_key(url, crawl))
+    if entry and time.time() - entry['fetched_at'] < SESSION_RESEARCH_TTL:
+        return entry
+    return None
+
+
+def render_brief(research: dict, status, mode: str, value_proposition, jd_content, cv_text, regenerate: bool, map_reduce: bool):
+    """
+    Streams the brief for a research bundle into the page as tokens arrive.
+    Re-raises stream_brief's RuntimeError, so a partial brief is never treated as finished.
+    """
+    brief_placeholder = st.empty()
+    report = ""
+    last_render = 0.0
+    try:
+        for chunk in stream_brief(
+            company_name=research['company_name'],
+            website_content=research['website_content'],
+            news_results=research['news_results'],
+            mode=mode,
+            value_proposition=value_proposition,
+            job_description=jd_content,
+            cv_text=cv_text,
+            on_progress=status.write,
+            regenerate=regenerate,
+            map_reduce=map_reduce
+        ):
+            report += chunk
+            # Throttle re-renders; re-parsing the markdown on every token gets expensive
+            if time.monotonic() - last_render > 0.1:
+                brief_placeholder.markdown(f'<div class="brief-container">{report}</div>', unsafe_allow_html=True)
+                last_render = time.monotonic()
+    except RuntimeError:
+        brief_placeholder.markdown(f'<div class="brief-container">{report}</div>', unsafe_allow_html=True)
+        status.update(label="Report generation failed", state="error")
+        raise
+
+    brief_placeholder.markdown(f'<div class="brief-container">{report}</div>', unsafe_allow_html=True)
+    return report
+
+
+def listed_job_ids() -> list:
+    """This tab's background job ids. They live in the URL, so a page reload doesn't lose them."""
+    return [job_id for job_id in st.query_params.get("jobs", "").split(",") if job_id]
+
+
+def remember_job(job_id: str):
+    st.query_params["jobs"] = ",".join((listed_job_ids() + [job_id])[-MAX_LISTED_JOBS:])
+
+
+@st.fragment(run_every=2)
+def render_jobs():
+    """Lists this tab's background jobs, refreshing every couple of seconds."""
+    job_ids = listed_job_ids()
+    if not job_ids:
+        return
+    queue = get_queue()
+    st.markdown("### Background jobs")
+    for job_id in reversed(job_ids):
+        job = queue.get(job_id)
+        if job is None:
+            continue
+        label = job['params'].get('company_name') or job['params'].get('url')
+        if job['status'] == 'done':
+            with st.expander(f"✓ {label} ({job['result']['elapsed']:.0f}s) — job {job_id}"):
+                st.markdown(f'<div class="brief-container">{job["result"]["report"]}</div>', unsafe_allow_html=True)
+        elif job['status'] == 'failed':
+            st.error(f"{label}: failed — {job['error']} (job {job_id})")
+        elif job['status'] == 'running':
+            st.info(f"⏳ {label}: {job['progress'] or 'running'}... (job {job_id})")
+        else:
+            st.info(f"🕒 {label}: queued, {queue.position(job_id)} ahead (job {job_id})")
+
 # Page configuration
 st.set_page_config(
     page_title="Company Intelligence Platform",
@@ -285,6 +381,7 @@ with col_content:
     jd_content = None
     cv_text = None
     value_proposition = None
+    competitor_urls = []
 
     if st.session_state.analysis_mode == "Target Account Research":
         st.markdown("### 2. My Solution")
@@ -294,6 +391,15 @@ with col_content:
             height=120,
             label_visibility="collapsed"
         )
+
+        st.markdown("### 3. Competitors (optional)")
+        competitors_text = st.text_area(
+            "Competitor URLs",
+            placeholder="One URL per line to compare the target against (up to 5)",
+            height=100,
+            label_visibility="collapsed"
+        )
+        competitor_urls = [u for u in parse_company_urls(competitors_text) if research_key(u, False) != research_key(url, False)][:5]
     else:
         st.markdown("### 2. Job Description")
         jd_content = st.text_area(
@@ -306,13 +412,38 @@ with col_content:
         st.markdown("### 3. Your CV")
         uploaded_cv = st.file_uploader("Upload CV (PDF)", type=["pdf"], label_visibility="collapsed")
         if uploaded_cv:
+            # Cached by file contents, so reruns (e.g. typing in the JD box) don't re-parse it
             with st.spinner("Processing CV..."):
-                cv_text = extract_text_from_pdf(uploaded_cv)
-                if cv_text.startswith("Error"):
-                    st.error("Failed to parse CV. Please try a different file.")
-                    cv_text = None
-                else:
-                    st.success("✓ CV processed successfully")
+                cv = extract_cv(uploaded_cv)
+            cv_text = cv['text']
+            if cv_text.startswith("Error"):
+                st.error("Failed to parse CV. Please try a different file.")
+                cv_text = None
+            else:
+                note = f" (first {cv['pages']} of {cv['total_pages']} pages)" if cv['truncated'] else ""
+                timing = "" if cv['cached'] else f" in {cv['elapsed']:.1f}s"
+                st.success(f"✓ CV processed successfully{note}{timing}")
+
+    deep_crawl = st.checkbox(
+        "Deep website crawl (about, products, customers, newsroom, careers pages)",
+        value=False,
+        key="deep_crawl"
+    )
+    map_reduce = st.checkbox(
+        "Two-stage analysis (summarize research first; faster on large crawls)",
+        value=False,
+        key="map_reduce"
+    )
+    run_in_background = st.checkbox(
+        "Run in background (submit and keep working; results appear below)",
+        value=True,
+        key="run_in_background"
+    )
+    force_refresh = st.checkbox(
+        "Force fresh research and analysis (ignore cached results)",
+        value=False,
+        key="force_refresh"
+    )
 
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -320,42 +451,155 @@ with col_content:
     btn_label = "Generate Strategic Brief" if st.session_state.analysis_mode == "Target Account Research" else "Generate Interview Strategy"
     
     st.markdown('<span id="cta-marker"></span>', unsafe_allow_html=True)
-    if st.button(btn_label, key="cta_main", use_container_width=True):
+    generate_clicked = st.button(btn_label, key="cta_main", use_container_width=True)
+
+    # Once this company has been researched in the session, the analysis can be
+    # rerun (e.g. after switching mode or editing inputs) without fetching again
+    cached_research = session_research(url, deep_crawl) if url else None
+    regenerate_clicked = False
+    if cached_research:
+        age_min = (time.time() - cached_research['fetched_at']) / 60
+        st.caption(f"Research for {cached_research['research']['company_name']} fetched {age_min:.0f} min ago in this session.")
+        regenerate_clicked = st.button("Regenerate analysis only", key="regenerate_analysis", use_container_width=True)
+
+    # Accounts briefed before with these same inputs can be refreshed with just the news since then
+    monitor_key = state_key(url, st.session_state.analysis_mode, value_proposition, jd_content, cv_text) if url else None
+    tracked = load_state(monitor_key) if monitor_key else None
+    updates_clicked = False
+    if tracked and not needs_full_brief(tracked) and not competitor_urls:
+        updates_clicked = st.button("What changed since the last brief?", key="check_updates", use_container_width=True)
+
+    if updates_clicked:
+        try:
+            run_id = metrics.start_run()
+            with st.status("🔎 Checking for new developments...") as status:
+                result = refresh_brief(
+                    monitor_key, tracked['company_name'], st.session_state.analysis_mode,
+                    value_proposition=value_proposition, job_description=jd_content, on_progress=st.write
+                )
+                if result is None:
+                    status.update(label="Previous brief is too old to extend; generate a full brief.", state="error")
+                else:
+                    label = (f"✓ {result['new_items']} new articles since {result['since']}" if result['new_items']
+                             else f"✓ Nothing new since {result['since']}")
+                    status.markdown("**Timing breakdown**\n\n" + metrics.format_breakdown(run_id))
+                    status.update(label=f"{label} ({result['elapsed']:.1f}s)", state="complete")
+            if result is not None:
+                st.markdown(f'<div class="brief-container">{result["report"]}</div>', unsafe_allow_html=True)
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+
+    if generate_clicked or regenerate_clicked:
         if not url:
             st.warning("Please enter a company URL.")
         elif st.session_state.analysis_mode == "Job Interview Prep" and not jd_content:
             st.warning("Please provide a Job Description.")
         elif not os.getenv("OPENAI_API_KEY"):
              st.error("API Key missing.")
+        # Without a live worker (none auto-started, see B2B_AUTOSTART_WORKERS) the brief runs inline below
+        elif run_in_background and not competitor_urls and ensure_workers():
+            # Same research reuse and cache bypass as the inline path
+            reuse_research = cached_research and (regenerate_clicked or not force_refresh)
+            job_id = get_queue().submit({
+                'url': url,
+                'company_name': extract_company_name(url) or "Target Company",
+                'mode': st.session_state.analysis_mode,
+                'value_proposition': value_proposition,
+                'job_description': jd_content,
+                'cv_text': cv_text,
+                'refresh': force_refresh,
+                'regenerate': force_refresh or regenerate_clicked,
+                'research': cached_research['research'] if reuse_research else None,
+                'crawl': deep_crawl,
+                'map_reduce': map_reduce,
+            })
+            remember_job(job_id)
+            st.success(f"Submitted job {job_id}. You can start another while it runs.")
+        elif competitor_urls:
+            # Competitive comparison: all companies are researched at once, then
+            # one brief each plus a comparative synthesis
+            try:
+                run_id = metrics.start_run()
+                urls = [url] + competitor_urls
+                reuse = {}
+                if not force_refresh:
+                    for u in urls:
+                        entry = session_research(u, deep_crawl)
+                        if entry:
+                            reuse[u] = entry['research']
+
+                with st.status(f"🛠️ Comparing {len(urls)} companies...") as status:
+                    started = time.monotonic()
+                    bundles = research_companies(urls, on_progress=st.write, refresh=force_refresh, crawl=deep_crawl, reuse=reuse)
+                    st.write(f"Research complete in {time.monotonic() - started:.1f}s")
+                    for u, bundle in zip(urls, bundles):
+                        if u not in reuse:
+                            st.session_state.setdefault('research_by_company', {})[research_key(u, deep_crawl)] = {
+                                'research': bundle,
+                                'fetched_at': time.time(),
+                            }
+
+                    status.update(label="✍️ Writing briefs and comparison...", state="running")
+                    result = compare_companies(
+                        bundles, mode=st.session_state.analysis_mode, value_proposition=value_proposition,
+                        on_progress=st.write, regenerate=force_refresh or regenerate_clicked, map_reduce=map_reduce
+                    )
+                    status.markdown("**Timing breakdown**\n\n" + metrics.format_breakdown(run_id))
+                    status.update(label=f"✓ Complete in {time.monotonic() - started:.1f}s", state="complete")
+
+                tabs = st.tabs(["Comparison"] + [name for name, _ in result['briefs']])
+                with tabs[0]:
+                    st.markdown(f'<div class="brief-container">{result["comparison"]}</div>', unsafe_allow_html=True)
+                for tab, (name, brief) in zip(tabs[1:], result['briefs']):
+                    with tab:
+                        st.markdown(f'<div class="brief-container">{brief}</div>', unsafe_allow_html=True)
+
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
         else:
             try:
                 company_name = extract_company_name(url) or "Target Company"
+                run_id = metrics.start_run()
                 
                 with st.status(f"🛠️ Building {st.session_state.analysis_mode} Report...") as status:
-                    st.write("Scraping website...")
-                    website_content = scrape_website(url) or "Website content unavailable."
-                    
-                    st.write("Analyzing news...")
-                    news_results = search_news(company_name)
+                    if cached_research and (regenerate_clicked or not force_refresh):
+                        research = cached_research['research']
+                        st.write("Reusing research already fetched in this session.")
+                    else:
+                        st.write("Scraping website and analyzing news...")
+                        research = run_research(url, company_name=company_name, on_progress=st.write, refresh=force_refresh, crawl=deep_crawl)
+                        st.write(f"Research complete in {research['elapsed']:.1f}s")
+                        st.session_state.setdefault('research_by_company', {})[research_key(url, deep_crawl)] = {
+                            'research': research,
+                            'fetched_at': time.time(),
+                        }
                     
                     st.write("Generating AI strategy...")
-                    report = generate_brief(
-                        company_name=company_name,
-                        website_content=website_content,
-                        news_results=news_results,
-                        mode=st.session_state.analysis_mode,
-                        value_proposition=value_proposition,
-                        job_description=jd_content,
-                        cv_text=cv_text
-                    )
-                    status.update(label="✓ Complete!", state="complete")
+                    status.update(label="✍️ Writing report...", state="running")
                 
-                st.markdown(f'<div class="brief-container">{report}</div>', unsafe_allow_html=True)
+                # Render the brief progressively as tokens arrive. "Regenerate analysis
+                # only" skips the response cache so it always produces a fresh take.
+                report = render_brief(
+                    research, status, st.session_state.analysis_mode,
+                    value_proposition, jd_content, cv_text,
+                    regenerate=force_refresh or regenerate_clicked,
+                    map_reduce=map_reduce
+                )
+                # Only reached when the stream finished; a failed one raised out of render_brief
+                record_brief(monitor_key, research['company_name'], research['news_results'], report,
+                             site_url=url, crawl=deep_crawl)
+                status.markdown("**Timing breakdown**\n\n" + metrics.format_breakdown(run_id))
+                status.update(label="✓ Complete!", state="complete")
                     
             except Exception as e:
                 st.error(f"Error: {str(e)}")
 
+    render_jobs()
+
     # Footer
     st.markdown("<br><br><br>", unsafe_allow_html=True)
     st.markdown('<div style="text-align: center; color: #6B7280; font-size: 0.85rem; margin-top: 1rem;">v2.2 Intelligence Platform</div>', unsafe_allow_html=True)
     st.markdown('<div style="text-align: center; color: #6B7280; font-size: 0.85rem;"><a href="https://www.linkedin.com/in/stevedporter/" style="color: #6B7280; text-decoration: none;">Built by Somar Intelligence</a></div>', unsafe_allow_html=True)
+
+# The page has rendered; load the SDKs and clients the first brief will need in the background
+start_warmup()
@@ -0,0 +1,305 @@
+"""
+Headless batch runner: generates briefs for every company in a CSV.
+
+Usage:
+    python batch.py accounts.csv --out batch_output
+
+The CSV needs a `url` column and may include `value_proposition` and
+`company_name` columns. Progress is checkpointed to <out>/checkpoint.jsonl,
+so re-running the same command after a crash skips rows that already
+completed successfully. A row's checkpoint key covers its URL and value
+proposition plus the --mode and --job-description, so changing either
+regenerates every row.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+from src.researcher import scrape_website, search_news, single_flight_stats
+from src.http_client import connection_stats
+from src.analyzer import generate_brief, llm_cache_stats
+from src.cache import normalize_domain_key
+from src.ratelimit import rate_limit_stats
+from src.monitor import state_key, record_brief, refresh_brief
+from src.utils import extract_company_name
+
+STAGES = ("scrape", "search", "generate")
+
+
+def load_rows(csv_path: str, mode: str, job_description: str = None) -> list:
+    """Reads the input CSV and returns a list of row dicts with a `key` stable for these inputs."""
+    # The same row under another mode or JD is different work, so it gets another key
+    run_inputs = mode + "|" + hashlib.sha1((job_description or "").encode('utf-8')).hexdigest()
+    rows = []
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in (reader.fieldnames or [])}
+        if 'url' not in fields:
+            raise ValueError(f"{csv_path} has no 'url' column")
+        for line_no, raw in enumerate(reader, start=2):
+            url = (raw.get(fields['url']) or "").strip()
+            if not url:
+                continue
+            value_proposition = (raw.get(fields.get('value_proposition', ''), "") or "").strip()
+            company_name = (raw.get(fields.get('company_name', ''), "") or "").strip()
+            digest = hashlib.sha1(
+                f"{normalize_domain_key(url)}|{value_proposition}|{run_inputs}".encode('utf-8')
+            ).hexdigest()[:10]
+            rows.append({
+                'key': digest,
+                'line': line_no,
+                'url': url,
+                'value_proposition': value_proposition or None,
+                'company_name': company_name or extract_company_name(url) or "Target Company",
+            })
+    return rows
+
+
+def load_checkpoint(path: str) -> dict:
+    """Returns {row_key: record} for every row recorded in the checkpoint file."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash mid-write can leave a truncated last line
+                continue
+            done[record['key']] = record
+    return done
+
+
+def report_filename(row: dict) -> str:
+    slug = "".join(c if c.isalnum() else "-" for c in normalize_domain_key(row['url'])).strip("-")
+    return f"{slug[:80]}_{row['key']}.md"
+
+
+class BatchRunner:
+    """
+    Runs scrape -> search -> generate for each row, with a separate bounded
+    thread pool per stage so slow LLM calls don't starve the fetchers.
+    """
+
+    def __init__(self, out_dir: str, mode: str, job_description: str = None,
+                 scrape_workers: int = 8, search_workers: int = 4, generate_workers: int = 4,
+                 refresh: bool = False, map_reduce: bool = False, incremental: bool = False):
+        self.out_dir = out_dir
+        self.reports_dir = os.path.join(out_dir, "reports")
+        self.checkpoint_path = os.path.join(out_dir, "checkpoint.jsonl")
+        self.mode = mode
+        self.job_description = job_description
+        self.refresh = refresh
+        self.map_reduce = map_reduce
+        self.incremental = incremental
+        self.pools = {
+            'scrape': ThreadPoolExecutor(max_workers=scrape_workers, thread_name_prefix="scrape"),
+            'search': ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="search"),
+            'generate': ThreadPoolExecutor(max_workers=generate_workers, thread_name_prefix="generate"),
+        }
+        # Row drivers only wait on stage futures, so this just needs to keep every stage busy
+        self.driver_workers = scrape_workers + search_workers + generate_workers
+        self._checkpoint_lock = threading.Lock()
+        os.makedirs(self.reports_dir, exist_ok=True)
+
+    def _timed(self, stage: str, fn, *args, **kwargs):
+        def run():
+            start = time.monotonic()
+            result = fn(*args, **kwargs)
+            return result, time.monotonic() - start
+        return self.pools[stage].submit(run)
+
+    def _record(self, record: dict):
+        with self._checkpoint_lock:
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _write_report(self, row: dict, record: dict, report: str):
+        filename = report_filename(row)
+        with open(os.path.join(self.reports_dir, filename), "w", encoding="utf-8") as f:
+            f.write(report)
+        record['report'] = os.path.join("reports", filename)
+
+    def process_row(self, row: dict) -> dict:
+        """Runs the full pipeline for one row and checkpoints the outcome."""
+        record = {
+            'key': row['key'],
+            'line': row['line'],
+            'url': row['url'],
+            'company_name': row['company_name'],
+            'status': 'ok',
+            'error': None,
+            'timings': {},
+            'report': None,
+        }
+        start = time.monotonic()
+        monitor_key = state_key(row['url'], self.mode, row['value_proposition'], self.job_description)
+        try:
+            if self.incremental:
+                update, record['timings']['generate'] = self._timed(
+                    'generate', refresh_brief, monitor_key, row['company_name'], self.mode,
+                    value_proposition=row['value_proposition'], job_description=self.job_description,
+                ).result()
+                if update is not None:
+                    self._write_report(row, record, update['report'])
+                    record['incremental'] = True
+                    record['articles'] = update['new_items']
+                    record['timings']['total'] = time.monotonic() - start
+                    self._record(record)
+                    return record
+
+            scrape_future = self._timed('scrape', scrape_website, row['url'], self.refresh)
+            search_future = self._timed('search', search_news, row['company_name'], self.refresh, site_url=row['url'])
+
+            website_content, record['timings']['scrape'] = scrape_future.result()
+            news_results, record['timings']['search'] = search_future.result()
+
+            report, record['timings']['generate'] = self._timed(
+                'generate', generate_brief,
+                company_name=row['company_name'],
+                website_content=website_content or "Website content unavailable.",
+                news_results=news_results,
+                mode=self.mode,
+                value_proposition=row['value_proposition'],
+                job_description=self.job_description,
+                map_reduce=self.map_reduce,
+            ).result()
+
+            if report.startswith("Error"):
+                raise RuntimeError(report)
+
+            record_brief(monitor_key, row['company_name'], news_results, report, site_url=row['url'])
+            self._write_report(row, record, report)
+            record['articles'] = len(news_results)
+            record['website_scraped'] = bool(website_content)
+        except Exception as e:
+            record['status'] = 'error'
+            record['error'] = str(e)
+
+        record['timings']['total'] = time.monotonic() - start
+        self._record(record)
+        return record
+
+    def run(self, rows: list) -> dict:
+        previous = load_checkpoint(self.checkpoint_path)
+        if self.incremental:
+            # An incremental run re-checks every row; rows with no new news cost no LLM call
+            todo = list(rows)
+        else:
+            todo = [r for r in rows if previous.get(r['key'], {}).get('status') != 'ok']
+        skipped = len(rows) - len(todo)
+        print(f"{len(rows)} rows, {skipped} already complete, {len(todo)} to process")
+
+        start = time.monotonic()
+        completed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.driver_workers, thread_name_prefix="row") as drivers:
+                futures = [drivers.submit(self.process_row, row) for row in todo]
+                for future in as_completed(futures):
+                    record = future.result()
+                    completed += 1
+                    outcome = "ok" if record['status'] == 'ok' else f"FAILED ({record['error'][:80]})"
+                    print(f"[{completed}/{len(todo)}] {record['url']} {outcome} in {record['timings']['total']:.1f}s")
+        finally:
+            for pool in self.pools.values():
+                pool.shutdown(wait=True)
+
+        summary = self.write_summary(rows, time.monotonic() - start)
+        return summary
+
+    def write_summary(self, rows: list, wall_time: float) -> dict:
+        """Writes summary.json covering every row in the input, including resumed ones."""
+        records = load_checkpoint(self.checkpoint_path)
+        relevant = [records[r['key']] for r in rows if r['key'] in records]
+        ok = [r for r in relevant if r['status'] == 'ok']
+        failed = [r for r in relevant if r['status'] != 'ok']
+
+        stage_stats = {}
+        for stage in STAGES + ("total",):
+            values = [r['timings'][stage] for r in ok if stage in r.get('timings', {})]
+            if values:
+                values.sort()
+                stage_stats[stage] = {
+                    'count': len(values),
+                    'mean': statistics.mean(values),
+                    'p50': values[len(values) // 2],
+                    'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+                    'max': values[-1],
+                }
+
+        summary = {
+            'rows': len(rows),
+            'succeeded': len(ok),
+            'failed': len(failed),
+            'pending': len(rows) - len(relevant),
+            'wall_time_this_run': wall_time,
+            'stage_timings': stage_stats,
+            'search_rate_limits': rate_limit_stats(),
+            'llm_cache': llm_cache_stats(),
+            'single_flight': single_flight_stats(),
+            'connections': connection_stats(),
+            'failures': [
+                {'line': r['line'], 'url': r['url'], 'error': r['error']} for r in failed
+            ],
+        }
+        with open(os.path.join(self.out_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate briefs for every company in a CSV.")
+    parser.add_argument("csv_path", help="CSV with a 'url' column and optional 'value_proposition' / 'company_name'")
+    parser.add_argument("--out", default="batch_output", help="Output directory for reports, checkpoint and summary")
+    parser.add_argument("--mode", default="Target Account Research",
+                        choices=["Target Account Research", "Job Interview Prep"])
+    parser.add_argument("--job-description", help="Path to a job description file (Interview Prep mode)")
+    parser.add_argument("--scrape-workers", type=int, default=8)
+    parser.add_argument("--search-workers", type=int, default=4)
+    parser.add_argument("--generate-workers", type=int, default=4)
+    parser.add_argument("--refresh", action="store_true", help="Bypass the research cache")
+    parser.add_argument("--map-reduce", action="store_true",
+                        help="Summarize research chunks with a cheaper model before writing each brief")
+    parser.add_argument("--incremental", action="store_true",
+                        help="For companies briefed before with the same inputs, only add a 'what changed' update")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if not os.getenv("OPENAI_API_KEY"):
+        parser.error("OPENAI_API_KEY not found in environment variables.")
+
+    job_description = None
+    if args.job_description:
+        with open(args.job_description, encoding="utf-8") as f:
+            job_description = f.read()
+
+    rows = load_rows(args.csv_path, args.mode, job_description)
+    runner = BatchRunner(
+        args.out, args.mode, job_description=job_description,
+        scrape_workers=args.scrape_workers,
+        search_workers=args.search_workers,
+        generate_workers=args.generate_workers,
+        refresh=args.refresh,
+        map_reduce=args.map_reduce,
+        incremental=args.incremental,
+    )
+    summary = runner.run(rows)
+    print(f"Done: {summary['succeeded']} succeeded, {summary['failed']} failed, {summary['pending']} pending. "
+          f"Summary written to {os.path.join(args.out, 'summary.json')}")
+
+
+if __name__ == "__main__":
+    main()
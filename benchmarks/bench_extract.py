@@ -0,0 +1,63 @@
+"""
+Benchmarks the HTML-to-text extraction engines over a corpus of saved pages.
+
+Usage:
+    python benchmarks/bench_extract.py [--corpus benchmarks/corpus] [--repeat 20] [--max-chars 15000]
+
+For each engine it reports mean time per page and throughput, and checks
+that the output matches the reference bs4 engine.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.extract import ENGINES, MAX_PAGE_CHARS  # noqa: E402
+
+
+def load_corpus(directory: str) -> dict:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.htm*"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus"))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-chars", type=int, default=MAX_PAGE_CHARS)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        parser.error(f"No .html files found in {args.corpus}")
+    total_bytes = sum(len(html.encode("utf-8")) for html in pages.values())
+    print(f"Corpus: {len(pages)} pages, {total_bytes / 1024:.0f} KiB, max_chars={args.max_chars}, repeat={args.repeat}\n")
+
+    reference = {name: ENGINES["bs4"](html, args.max_chars, False)['text'] for name, html in pages.items()}
+
+    print(f"{'engine':<8} {'ms/page':>9} {'MiB/s':>8} {'speedup':>8}  parity")
+    baseline = None
+    for engine in ["bs4", "stream", "lxml"]:
+        extract = ENGINES[engine]
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for html in pages.values():
+                extract(html, args.max_chars, False)
+        elapsed = time.perf_counter() - start
+
+        per_page_ms = elapsed / (args.repeat * len(pages)) * 1000
+        mib_s = total_bytes * args.repeat / elapsed / (1024 * 1024)
+        baseline = baseline or per_page_ms
+        mismatches = [name for name, html in pages.items() if extract(html, args.max_chars, False)['text'] != reference[name]]
+        parity = "ok" if not mismatches else "DIFFERS: " + ", ".join(mismatches)
+        print(f"{engine:<8} {per_page_ms:>9.2f} {mib_s:>8.1f} {baseline / per_page_ms:>7.1f}x  {parity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Offline end-to-end benchmark of the research pipeline.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--scenarios scrape,search,generate,stream,full]
+                                        [--concurrency 1,4,16] [--requests 32]
+                                        [--llm-latency 0.5] [--ddg-latency 0.3] ...
+                                        [--results benchmarks/results.jsonl]
+
+The website, DuckDuckGo, Google News RSS and OpenAI endpoints are replaced
+by local stand-ins (see benchmarks/stubs.py) with configurable latency, so
+runs are repeatable and need no network or API key. Caches are bypassed
+(refresh/regenerate) and live in a throwaway directory.
+
+For each scenario and concurrency level it reports p50/p95/p99 latency,
+throughput, CPU seconds used by the process and peak RSS, and appends one
+JSON line per result to the results file together with the git commit, so
+runs can be compared over time. The search rate limits are raised out of the
+way (unless set in the environment), so search/full measure the pipeline
+rather than the token buckets, and a request counts as an error when any
+of its sources ends other than 'ok' (timeout, throttled, rate-limited).
+The stand-ins run in the same process; they
+mostly sleep, so their CPU share is small. Peak RSS is the process high-water
+mark, so scenarios are ordered from lightest to heaviest.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Must be set before src is imported: the cache location is read at import time.
+os.environ["B2B_CACHE_DIR"] = tempfile.mkdtemp(prefix="b2b-bench-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+# The stand-ins never rate-limit, so neither should we (see src/ratelimit.py)
+for _name in ("B2B_DDG_RATE", "B2B_DDG_MAX_RATE", "B2B_DDG_BURST", "B2B_RSS_RATE", "B2B_RSS_MAX_RATE", "B2B_RSS_BURST"):
+    os.environ.setdefault(_name, "1000")
+
+from benchmarks.stubs import StubEnvironment, StubDDGS  # noqa: E402
+from src import researcher, analyzer  # noqa: E402
+from src.pipeline import run_research  # noqa: E402
+from src.researcher import summarize_statuses  # noqa: E402
+
+SCENARIOS = ["scrape", "search", "generate", "stream", "full"]
+DEFAULT_RESULTS = os.path.join(ROOT, "benchmarks", "results.jsonl")
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def _sample_research(env: StubEnvironment) -> dict:
+    """One real research bundle against the stand-ins, reused as input for the LLM scenarios."""
+    return run_research(f"{env.site.url}/", company_name="Example Corp", refresh=True)
+
+
+def _check_sources(statuses: dict):
+    """Raises unless every research source answered in full; partial results are a failure here."""
+    if any(status['status'] != 'ok' for status in statuses.values()):
+        raise RuntimeError(f"sources not ok: {summarize_statuses(statuses)}")
+
+
+def make_scenario(name: str, env: StubEnvironment, research: dict, crawl: bool):
+    """Returns a callable(i) doing one unit of work; raises or returns an 'Error...' string on failure."""
+    site_url = f"{env.site.url}/"
+
+    def brief_args(i):
+        return dict(
+            company_name=f"Example Corp {i}",
+            website_content=research['website_content'],
+            news_results=research['news_results'],
+            mode="Target Account Research",
+            value_proposition="Workflow automation for finance teams",
+        )
+
+    if name == "scrape":
+        return lambda i: researcher.scrape_website(site_url, refresh=True, crawl=crawl)
+    if name == "search":
+        def search(i):
+            results, statuses = researcher.search_news_with_status(f"Example Corp {i}", refresh=True)
+            _check_sources(statuses)
+            return results
+        return search
+    if name == "generate":
+        return lambda i: analyzer.generate_brief(**brief_args(i), regenerate=True)
+    if name == "stream":
+        return lambda i: "".join(analyzer.stream_brief(**brief_args(i), regenerate=True))
+    if name == "full":
+        def full(i):
+            bundle = run_research(site_url, company_name=f"Example Corp {i}", refresh=True, crawl=crawl)
+            _check_sources(bundle['source_status'])
+            return analyzer.generate_brief(
+                company_name=bundle['company_name'],
+                website_content=bundle['website_content'],
+                news_results=bundle['news_results'],
+                mode="Target Account Research",
+                value_proposition="Workflow automation for finance teams",
+                regenerate=True,
+            )
+        return full
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def run_scenario(fn, concurrency: int, requests: int) -> dict:
+    latencies = []
+    errors = 0
+
+    def timed(i):
+        started = time.perf_counter()
+        try:
+            result = fn(i)
+            ok = not (isinstance(result, str) and result.startswith("Error"))
+        except Exception as e:
+            print(f"  request {i} failed: {e}")
+            ok = False
+        return time.perf_counter() - started, ok
+
+    cpu_start = _cpu_seconds()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, ok in pool.map(timed, range(requests)):
+            latencies.append(latency)
+            errors += 0 if ok else 1
+    wall = time.perf_counter() - wall_start
+
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': errors,
+        'wall_s': round(wall, 4),
+        'throughput_rps': round(requests / wall, 3) if wall else 0.0,
+        'p50_s': round(_percentile(latencies, 50), 4),
+        'p95_s': round(_percentile(latencies, 95), 4),
+        'p99_s': round(_percentile(latencies, 99), 4),
+        'cpu_s': round(_cpu_seconds() - cpu_start, 3),
+        'peak_rss_mib': round(_peak_rss_mib(), 1),
+    }
+
+
+def load_previous(path: str) -> dict:
+    """Latest stored result per (scenario, concurrency), for the comparison column."""
+    previous = {}
+    if not os.path.exists(path):
+        return previous
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            previous[(row.get('scenario'), row.get('concurrency'))] = row
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per scenario and concurrency level")
+    parser.add_argument("--crawl", action="store_true", help="Use the multi-page crawl for scrape/full")
+    parser.add_argument("--site-latency", type=float, default=0.05)
+    parser.add_argument("--rss-latency", type=float, default=0.1)
+    parser.add_argument("--ddg-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--chunk-delay", type=float, default=0.002, help="Seconds between streamed chunks")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter on every stub latency")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSON-lines file results are appended to")
+    parser.add_argument("--label", default="", help="Free-form tag stored with the results")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    config = {k: v for k, v in vars(args).items() if k not in ('results', 'scenarios', 'concurrency', 'label')}
+    previous = load_previous(args.results)
+    commit = _git_commit()
+
+    with StubEnvironment(
+        site_latency=args.site_latency, rss_latency=args.rss_latency, ddg_latency=args.ddg_latency,
+        llm_latency=args.llm_latency, chunk_delay=args.chunk_delay, jitter=args.jitter,
+    ) as env:
+        researcher.DDGS = StubDDGS
+        researcher.GOOGLE_NEWS_RSS_URL = env.rss.url + "/rss/search?q={query}"
+        os.environ["OPENAI_BASE_URL"] = env.llm.url + "/v1"
+
+        research = _sample_research(env)
+        print(f"Sample research: {len(research['website_content'])} website chars, "
+              f"{len(research['news_results'])} news items\n")
+
+        print(f"{'scenario':<9} {'conc':>4} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'req/s':>7} "
+              f"{'cpu s':>6} {'rss MiB':>8} {'err':>4}  vs previous p95")
+        with open(args.results, "a", encoding="utf-8") as out:
+            for name in scenarios:
+                fn = make_scenario(name, env, research, args.crawl)
+                for concurrency in levels:
+                    result = run_scenario(fn, concurrency, args.requests)
+                    before = previous.get((name, concurrency))
+                    delta = ""
+                    if before and before.get('p95_s'):
+                        delta = f"{(result['p95_s'] / before['p95_s'] - 1) * 100:+.0f}% ({before.get('commit', '?')})"
+                    print(f"{name:<9} {concurrency:>4} {result['p50_s']:>7.3f} {result['p95_s']:>7.3f} "
+                          f"{result['p99_s']:>7.3f} {result['throughput_rps']:>7.2f} {result['cpu_s']:>6.2f} "
+                          f"{result['peak_rss_mib']:>8.1f} {result['errors']:>4}  {delta}")
+                    row = {
+                        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                        'commit': commit,
+                        'label': args.label,
+                        'python': platform.python_version(),
+                        'scenario': name,
+                        **result,
+                        'config': config,
+                    }
+                    out.write(json.dumps(row) + "\n")
+                    out.flush()
+
+    print(f"\nResults appended to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Cold-start benchmark: how long the app's entry points take to import.
+
+Usage:
+    python benchmarks/bench_startup.py [--targets app,batch,worker] [--repeat 7]
+                                       [--results benchmarks/results.jsonl]
+
+Each target is imported in a fresh interpreter with `python -X importtime`,
+`--repeat` times. It reports the median wall time (less a bare interpreter
+start) and the median import time, and lists any of the heavy
+dependencies that got imported eagerly. Those should only load at first
+use or in the background warm-up (src/warmup.py), so a name in that
+column is a regression. Results are appended to the results file with the
+git commit, next to bench_pipeline.py's, and compared with the previous run.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RESULTS = os.path.join(ROOT, "benchmarks", "results.jsonl")
+
+# What each entry point imports before it can do anything. "app" is the
+# app's own modules; Streamlit itself is outside our control and excluded.
+TARGETS = {
+    'app': "import src.pipeline, src.analyzer, src.pdf_utils, src.compare, src.jobs, src.monitor, src.warmup",
+    'batch': "import batch",
+    'worker': "import worker",
+}
+HEAVY_MODULES = ('openai', 'duckduckgo_search', 'bs4', 'fake_useragent', 'PyPDF2', 'lxml', 'tiktoken')
+
+
+def _run(statement: str) -> tuple:
+    """Runs the statement in a fresh interpreter. Returns (wall seconds, import seconds, heavy modules loaded)."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True,
+        env=dict(os.environ, B2B_METRICS_PORT=""),
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    heavy = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # Header line
+        module = name.strip()
+        if module.split(".")[0] in HEAVY_MODULES:
+            heavy.add(module.split(".")[0])
+        # Top-level entries (no indentation) add up to the whole import
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return wall, total_us / 1e6, sorted(heavy)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def load_previous(path: str) -> dict:
+    """Latest stored startup result per scenario, for the comparison column."""
+    previous = {}
+    if not os.path.exists(path):
+        return previous
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if str(row.get('scenario', '')).startswith("startup:"):
+                previous[row['scenario']] = row
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Comma-separated subset of: " + ", ".join(TARGETS))
+    parser.add_argument("--repeat", type=int, default=7, help="Fresh interpreters per target")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSON-lines file results are appended to")
+    parser.add_argument("--label", default="", help="Free-form tag stored with the results")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        parser.error(f"Unknown targets: {', '.join(unknown)}")
+
+    previous = load_previous(args.results)
+    commit = _git_commit()
+    baseline = statistics.median(_run("pass")[0] for _ in range(args.repeat))
+    print(f"Bare interpreter start: {baseline * 1000:.0f} ms (subtracted from wall times)\n")
+
+    print(f"{'target':<8} {'wall ms':>8} {'import ms':>10}  {'eager heavy imports':<28} vs previous wall")
+    with open(args.results, "a", encoding="utf-8") as out:
+        for name in targets:
+            runs = [_run(TARGETS[name]) for _ in range(args.repeat)]
+            wall = max(0.0, statistics.median(r[0] for r in runs) - baseline)
+            imports = statistics.median(r[1] for r in runs)
+            heavy = runs[-1][2]
+            scenario = f"startup:{name}"
+            before = previous.get(scenario)
+            delta = ""
+            if before and before.get('wall_s'):
+                delta = f"{(wall / before['wall_s'] - 1) * 100:+.0f}% ({before.get('commit', '?')})"
+            print(f"{name:<8} {wall * 1000:>8.0f} {imports * 1000:>10.0f}  {', '.join(heavy) or '-':<28} {delta}")
+            row = {
+                'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                'commit': commit,
+                'label': args.label,
+                'python': platform.python_version(),
+                'scenario': scenario,
+                'wall_s': round(wall, 4),
+                'import_s': round(imports, 4),
+                'heavy_modules': heavy,
+                'config': {'repeat': args.repeat},
+            }
+            out.write(json.dumps(row) + "\n")
+            out.flush()
+
+    print(f"\nResults appended to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Local stand-ins for the external services the pipeline talks to:
+
+- a static website serving the saved pages in benchmarks/corpus
+- a Google News style RSS feed
+- a DuckDuckGo text-search endpoint (plus a DDGS-compatible client class)
+- an OpenAI-compatible /v1/chat/completions endpoint, with optional streaming
+
+Every server takes a fixed latency (seconds) and optional jitter so runs
+are reproducible without touching the network.
+"""
+import glob
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+from xml.sax.saxutils import escape
+
+import requests
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+REPORT_TEXT = (
+    "📊 Research Sources: DuckDuckGo + Google News | Website: Yes | Articles Analyzed: 8\n\n"
+    "# Strategic Account Brief: Example\n\n## 1. Company Profile\n"
+    + "Example Corp builds enterprise cloud software for regulated industries. " * 20
+    + "\n\n## 2. Recent Developments\n"
+    + "- [March 2025] Example Corp announced a strategic partnership.\n" * 8
+    + "\n## 3. Buying Signals & Strategic Shifts\n"
+    + "Expansion into new markets suggests growing operational complexity. " * 25
+)
+
+
+class _StubServer:
+    """Runs a handler class on an ephemeral localhost port in a daemon thread."""
+
+    def __init__(self, handler_cls, **config):
+        handler = type(handler_cls.__name__, (handler_cls,), {'config': config})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _BaseHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like real servers
+    config = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self):
+        latency = self.config.get('latency', 0.0)
+        jitter = self.config.get('jitter', 0.0)
+        if latency or jitter:
+            time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SiteHandler(_BaseHandler):
+    """Serves corpus pages; '/' is the homepage and any other path maps onto a page by hash."""
+
+    def do_GET(self):
+        self._delay()
+        pages = self.config['pages']
+        path = urlparse(self.path).path
+        if path in ("", "/"):
+            name = self.config.get('homepage') or sorted(pages)[0]
+        else:
+            names = sorted(pages)
+            # Stable across processes (str hash() is randomized per interpreter)
+            name = names[int(hashlib.sha1(path.encode("utf-8")).hexdigest(), 16) % len(names)]
+        # Static pages carry a validator, so conditional re-fetches get a 304
+        etag = '"' + hashlib.sha1(pages[name]).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(pages[name])))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(pages[name])
+
+
+class RssHandler(_BaseHandler):
+    def do_GET(self):
+        self._delay()
+        query = parse_qs(urlparse(self.path).query).get('q', ['company'])[0]
+        items = []
+        for i in range(self.config.get('items', 20)):
+            pub = formatdate(time.time() - i * 86400, usegmt=True)
+            items.append(
+                f"<item><title>{escape(query)} headline {i} - Publisher {i % 5}</title>"
+                f"<link>https://news.example.com/{quote(query)}/{i}</link>"
+                f"<pubDate>{pub}</pubDate>"
+                f"<description>&lt;a href=\"#\"&gt;{escape(query)} story {i}&lt;/a&gt;</description></item>"
+            )
+        body = ("<?xml version=\"1.0\" encoding=\"UTF-8\"?><rss version=\"2.0\"><channel>"
+                f"<title>{escape(query)} - Google News</title>{''.join(items)}</channel></rss>")
+        self._send(200, body.encode("utf-8"), "application/rss+xml; charset=utf-8")
+
+
+class DdgHandler(_BaseHandler):
+    def do_GET(self):
+        self._delay()
+        params = parse_qs(urlparse(self.path).query)
+        query = params.get('q', [''])[0]
+        max_results = int(params.get('max_results', ['3'])[0])
+        results = [
+            {
+                'title': f"{query} result {i}",
+                'href': f"https://www.example-news.com/{quote(query.replace(' ', '-'))}/{i}?utm_source=ddg",
+                'body': f"Snippet {i} about {query}: the company announced plans to expand its platform.",
+            }
+            for i in range(max_results)
+        ]
+        self._send(200, json.dumps(results).encode("utf-8"), "application/json")
+
+
+class OpenAIHandler(_BaseHandler):
+    """Minimal /v1/chat/completions: JSON or SSE streaming with a per-chunk delay."""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self._delay()  # Time to first token
+        prompt_chars = sum(len(m.get('content', '')) for m in request.get('messages', []))
+        prompt_tokens = prompt_chars // 4
+        text = self.config.get('report', REPORT_TEXT)
+        completion_tokens = len(text) // 4
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                 'total_tokens': prompt_tokens + completion_tokens}
+        created = int(time.time())
+        model = request.get('model', 'gpt-4o')
+
+        if not request.get('stream'):
+            body = {
+                'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': text}}],
+                'usage': usage,
+            }
+            self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        chunk_chars = self.config.get('chunk_chars', 16)
+        chunk_delay = self.config.get('chunk_delay', 0.0)
+        for i in range(0, len(text), chunk_chars):
+            event = {
+                'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'delta': {'content': text[i:i + chunk_chars]}, 'finish_reason': None}],
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if chunk_delay:
+                time.sleep(chunk_delay)
+        final = {'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                 'choices': [], 'usage': usage}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class StubDDGS:
+    """Drop-in for duckduckgo_search.DDGS that queries the local DDG stand-in."""
+
+    base_url = None
+    _session = requests.Session()
+
+    def text(self, keywords: str, max_results: int = 3, **kwargs):
+        response = self._session.get(f"{self.base_url}/ddg", params={'q': keywords, 'max_results': max_results}, timeout=30)
+        response.raise_for_status()
+        return iter(response.json())
+
+
+def load_corpus_pages(directory: str = CORPUS_DIR) -> dict:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.htm*"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+class StubEnvironment:
+    """Starts all stand-ins together. Use as a context manager."""
+
+    def __init__(self, site_latency=0.05, rss_latency=0.1, ddg_latency=0.3, llm_latency=0.5,
+                 chunk_delay=0.002, jitter=0.0):
+        pages = load_corpus_pages()
+        self.site = _StubServer(SiteHandler, pages=pages, latency=site_latency, jitter=jitter)
+        self.rss = _StubServer(RssHandler, latency=rss_latency, jitter=jitter)
+        self.ddg = _StubServer(DdgHandler, latency=ddg_latency, jitter=jitter)
+        self.llm = _StubServer(OpenAIHandler, latency=llm_latency, jitter=jitter, chunk_delay=chunk_delay)
+        self.servers = [self.site, self.rss, self.ddg, self.llm]
+
+    def __enter__(self):
+        for server in self.servers:
+            server.start()
+        StubDDGS.base_url = self.ddg.url
+        return self
+
+    def __exit__(self, *exc):
+        for server in self.servers:
+            server.stop()
@@ -1,47 +1,91 @@
+import hashlib
+import json
 import os
-from openai import OpenAI
-from src.prompts import SALES_OUTREACH_PROMPT, INTERVIEW_PREP_PROMPT
+import threading
+import time
+from typing import TYPE_CHECKING
+from src.prompts import SALES_OUTREACH_PROMPT, INTERVIEW_PREP_PROMPT, COMPARISON_PROMPT, DELTA_BRIEF_PROMPT
+from src.context import assemble_context, count_tokens, format_news_item
+from src.summarize import map_research
+from src.cache import get_cache, normalize_query_key
+from src.fingerprint import research_fingerprint, compare_fingerprints, inputs_hash
+from src import metrics
 
-def generate_brief(
-    company_name: str, 
-    website_content: str, 
-    news_results: list, 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+SYSTEM_MESSAGE = "You are a helpful and insightful strategic assistant."
+MODEL = "gpt-4o"
+TEMPERATURE = 0.3
+# Minimum website similarity (estimated Jaccard, after masking dates and counters) to
+# the last run for the previous report to be reused; the news set must be identical.
+# Set above 1 to disable.
+REUSE_SIMILARITY = float(os.getenv("B2B_REUSE_SIMILARITY", 0.95))
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+
+def _get_client(api_key: str) -> "OpenAI":
+    """
+    Returns the process-wide OpenAI client, so its connection pool is reused
+    across briefs. Rebuilt only if the API key changes.
+    """
+    global _client, _client_key
+    with _client_lock:
+        if _client is None or _client_key != api_key:
+            # Imported on first use: the SDK takes longer to import than the rest of the app
+            from openai import OpenAI
+            _client = OpenAI(api_key=api_key)
+            _client_key = api_key
+        return _client
+
+def prepare_prompt(
+    company_name: str,
+    website_content: str,
+    news_results: list,
     mode: str = "Sales Outreach",
     value_proposition: str = None,
     job_description: str = None,
-    cv_text: str = None
-) -> str:
+    cv_text: str = None,
+    model: str = MODEL
+) -> dict:
     """
-    Generates a strategic report (Sales Brief or Interview Strategy) using OpenAI.
+    Renders the Sales Outreach or Interview Prep prompt for the given research.
+
+    Website chunks and news items are ranked against the value proposition
+    (or job description) and packed into the model's token budget.
+    Returns {'prompt': str, 'prompt_tokens': int, 'context': dict}.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return "Error: OPENAI_API_KEY not found in environment variables."
+    # Determine status for header (before packing, which may drop the sentinel text)
+    scraped_bool = len(website_content) > 100 and "unavailable" not in website_content
+    scraped_status_str = "Yes" if scraped_bool else "No (Restricted)"
 
-    client = OpenAI(api_key=api_key)
+    is_interview = "Interview" in mode  # Handles both "Job Interview Prep" and legacy "Interview Prep"
+    context = assemble_context(
+        website_content,
+        news_results,
+        query=job_description if is_interview else value_proposition,
+        mode=mode,
+        model=model
+    )
+    news_results = context['news_results']
 
     # Format news for the prompt
     news_text = ""
     article_count = 0
     if news_results:
-        article_count = len(news_results)
-        for item in news_results:
-             title = item.get('title', 'No Title')
-             link = item.get('href', item.get('link', ''))
-             snippet = item.get('body', item.get('snippet', 'No snippet'))
-             news_text += f"- {title}: {snippet} ({link})\n"
+        # Map-reduce news digests stand for several articles each
+        article_count = sum(item.get('articles', 1) for item in news_results)
+        news_text = "\n".join(format_news_item(item) for item in news_results) + "\n"
     else:
         news_text = "No recent news found."
 
-    # Determine status for header
-    scraped_bool = len(website_content) > 100 and "unavailable" not in website_content
-    scraped_status_str = "Yes" if scraped_bool else "No (Restricted)"
-    
-    # Select prompt based on mode
-    if "Interview" in mode:  # Handles both "Job Interview Prep" and legacy "Interview Prep"
+    if is_interview:
         prompt = INTERVIEW_PREP_PROMPT.format(
             company_name=company_name,
-            website_content=website_content[:10000], # Slightly smaller context for multi-source
+            website_content=context['website_content'],
             news_text=news_text,
             job_description=job_description or "Not provided",
             cv_text=cv_text or "Not provided",
@@ -53,34 +97,468 @@ def generate_brief(
         val_prop_context = value_proposition if value_proposition and value_proposition.strip() else "Premium B2B Services"
         prompt = SALES_OUTREACH_PROMPT.format(
             company_name=company_name,
-            website_content=website_content[:15000],
+            website_content=context['website_content'],
             news_text=news_text,
             val_prop_context=val_prop_context,
             scraped_status=scraped_status_str,
             article_count=article_count
         )
 
+    return {
+        'prompt': prompt,
+        'prompt_tokens': count_tokens(SYSTEM_MESSAGE, model) + count_tokens(prompt, model),
+        'context': context,
+    }
+
+def _describe_prompt(prepared: dict) -> str:
+    context = prepared['context']
+    used, total = context['website_chunks']
+    return (f"Prompt: {prepared['prompt_tokens']:,} tokens "
+            f"(website {context['website_tokens']:,} from {used}/{total} chunks, "
+            f"news {context['news_tokens']:,} from {len(context['news_results'])} articles)")
+
+def _response_cache_key(model: str, system_message: str, prompt: str, temperature: float) -> str:
+    """Hashes everything that determines the completion."""
+    payload = json.dumps([model, system_message, prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _cached_response(key: str, on_progress=None):
+    """Returns the cached report for a rendered prompt, recording the tokens saved."""
+    cache = get_cache("llm")
+    cached = cache.get('llm', key)
+    if cached is None:
+        return None
+    saved = cached.get('prompt_tokens', 0) + cached.get('completion_tokens', 0)
+    cache.add_metric('llm', 'saved_tokens', saved)
+    message = f"Reusing cached analysis for identical prompt (saved ~{saved:,} tokens)"
+    print(message)
+    if on_progress:
+        on_progress(message)
+    return cached['content']
+
+def _store_response(key: str, content: str, usage, prepared: dict):
+    """Caches a successful report with its token usage."""
+    get_cache("llm").set('llm', key, {
+        'content': content,
+        'prompt_tokens': getattr(usage, 'prompt_tokens', None) or prepared['prompt_tokens'],
+        'completion_tokens': getattr(usage, 'completion_tokens', None) or count_tokens(content, MODEL),
+    })
+
+def _run_key(company_name: str, mode: str, value_proposition: str, job_description: str,
+             cv_text: str, map_reduce: bool) -> str:
+    key = normalize_query_key(company_name) + "|" + inputs_hash(mode, value_proposition, job_description, cv_text)
+    return key + "|map" if map_reduce else key
+
+def _reusable_report(run_key: str, fingerprint: dict, on_progress=None):
+    """Returns the last report for this company and inputs if its research hasn't materially changed."""
+    previous = get_cache("llm").get('llm_runs', run_key)
+    if previous is None:
+        return None
+    similarity = compare_fingerprints(previous['fingerprint'], fingerprint)
+    # Any added or removed article is material; only page text gets the noise tolerance
+    if similarity['news'] < 1.0 or similarity['website'] < REUSE_SIMILARITY:
+        print(f"Research changed since last run (website {similarity['website']:.0%}, "
+              f"news {similarity['news']:.0%} similar); regenerating")
+        return None
+    message = (f"Research unchanged since last run (website {similarity['website']:.0%}, "
+               f"news {similarity['news']:.0%} similar); reusing previous analysis")
+    print(message)
+    if on_progress:
+        on_progress(message)
+    return previous['content']
+
+def _store_run(run_key: str, fingerprint: dict, content: str):
+    get_cache("llm").set('llm_runs', run_key, {'fingerprint': fingerprint, 'content': content, 'created': time.time()})
+
+def llm_cache_stats() -> dict:
+    """Returns hit/miss counts and total tokens saved by the response cache."""
+    stats = get_cache("llm").stats()
+    llm = stats['namespaces'].get('llm', {})
+    hits, misses = llm.get('hits', 0), llm.get('misses', 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'saved_tokens': int(llm.get('saved_tokens', 0)),
+        'entries': stats['entries'],
+        'bytes': stats['bytes'],
+    }
+
+metrics.register_collector("llm_cache", llm_cache_stats)
+
+def _clean_report(content: str) -> str:
+    """
+    Strips markdown code block wrapping and backticks from a complete report.
+    """
+    # Strip potential markdown code block wrapping
+    if content.startswith("```markdown"):
+        content = content.replace("```markdown", "").replace("```", "")
+    elif content.startswith("```"):
+         content = content.replace("```", "")
+    
+    # Remove all backticks to prevent inline code formatting (white background issue)
+    return content.replace("`", "")
+
+class StreamCleaner:
+    """
+    Incremental version of _clean_report for streamed output.
+
+    Feed raw chunks in order; the concatenation of everything returned by
+    feed() and flush() equals _clean_report() of the full text.
+    """
+    FENCE = "```markdown"
+
+    def __init__(self):
+        self._buffer = ""
+        self._strip_fence = None  # Unknown until the opening characters have arrived
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk or ""
+        if self._strip_fence is None:
+            if len(self._buffer) < len(self.FENCE) and self.FENCE.startswith(self._buffer):
+                return ""
+            self._strip_fence = self._buffer.startswith(self.FENCE)
+
+        if not self._strip_fence:
+            out, self._buffer = self._buffer, ""
+            return out.replace("`", "")
+
+        # Hold back a trailing partial fence so it can be matched across chunk boundaries
+        text = self._buffer.replace(self.FENCE, "")
+        hold = 0
+        for size in range(min(len(self.FENCE) - 1, len(text)), 0, -1):
+            if self.FENCE.startswith(text[-size:]):
+                hold = size
+                break
+        self._buffer = text[len(text) - hold:] if hold else ""
+        out = text[:len(text) - hold]
+        return out.replace("`", "")
+
+    def flush(self) -> str:
+        out, self._buffer = self._buffer, ""
+        if self._strip_fence:
+            out = out.replace(self.FENCE, "")
+        return out.replace("`", "")
+
+def _prepare_brief(
+    company_name: str,
+    website_content: str,
+    news_results: list,
+    mode: str,
+    value_proposition: str,
+    job_description: str,
+    cv_text: str,
+    on_progress,
+    regenerate: bool,
+    map_reduce: bool
+) -> dict:
+    """
+    Everything generate_brief and stream_brief do before calling the model.
+
+    Returns {'report': str} when the brief is answered without a model call
+    (missing API key, unchanged research or an identical cached prompt), else
+    the request to send: {'client', 'prompt', 'prepared', 'cache_key', 'run_key', 'fingerprint'}.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return {'report': "Error: OPENAI_API_KEY not found in environment variables."}
+
+    client = _get_client(api_key)
+
+    run_key = _run_key(company_name, mode, value_proposition, job_description, cv_text, map_reduce)
+    fingerprint = research_fingerprint(website_content, news_results)
+    if not regenerate:
+        previous = _reusable_report(run_key, fingerprint, on_progress)
+        if previous is not None:
+            metrics.record("llm_call", 0.0, outcome="unchanged", model=MODEL)
+            return {'report': previous}
+
+    if map_reduce:
+        summarized = map_research(client, company_name, website_content, news_results, on_progress)
+        website_content, news_results = summarized['website_content'], summarized['news_results']
+
+    with metrics.span("prompt_assembly") as span:
+        prepared = prepare_prompt(
+            company_name, website_content, news_results, mode,
+            value_proposition, job_description, cv_text
+        )
+        span.set_tokens(prompt=prepared['prompt_tokens'])
+    print(_describe_prompt(prepared))
+    if on_progress:
+        on_progress(_describe_prompt(prepared))
+
+    cache_key = _response_cache_key(MODEL, SYSTEM_MESSAGE, prepared['prompt'], TEMPERATURE)
+    if not regenerate:
+        cached = _cached_response(cache_key, on_progress)
+        if cached is not None:
+            metrics.record("llm_call", 0.0, outcome="cache_hit", model=MODEL)
+            _store_run(run_key, fingerprint, cached)
+            return {'report': cached}
+
+    return {
+        'client': client,
+        'prompt': prepared['prompt'],
+        'prepared': prepared,
+        'cache_key': cache_key,
+        'run_key': run_key,
+        'fingerprint': fingerprint,
+    }
+
+def _finish_brief(request: dict, content: str, usage):
+    """Caches a report the model just wrote, by prompt and as the company's latest run."""
+    _store_response(request['cache_key'], content, usage, request['prepared'])
+    _store_run(request['run_key'], request['fingerprint'], content)
+
+def generate_brief(
+    company_name: str, 
+    website_content: str, 
+    news_results: list, 
+    mode: str = "Sales Outreach",
+    value_proposition: str = None,
+    job_description: str = None,
+    cv_text: str = None,
+    on_progress=None,
+    regenerate: bool = False,
+    map_reduce: bool = False
+) -> str:
+    """
+    Generates a strategic report (Sales Brief or Interview Strategy) using OpenAI.
+    `on_progress`, if given, receives a message with the prompt token count before the call.
+    Identical prompts are answered from the local response cache unless regenerate=True,
+    and so is research whose news matches the last run for this company and inputs
+    and whose website is within REUSE_SIMILARITY of it (see src/fingerprint.py).
+    With map_reduce=True the research is first condensed by summarize.map_research and
+    the report is written from those summaries.
+    """
+    request = _prepare_brief(
+        company_name, website_content, news_results, mode, value_proposition,
+        job_description, cv_text, on_progress, regenerate, map_reduce
+    )
+    if 'report' in request:
+        return request['report']
+    client, prompt = request['client'], request['prompt']
+
+    try:
+        with metrics.span("llm_call", model=MODEL) as span:
+            response = client.chat.completions.create(
+                model=MODEL, 
+                messages=[
+                    {"role": "system", "content": SYSTEM_MESSAGE},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=TEMPERATURE
+            )
+            if response.usage:
+                span.set_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
+        with metrics.span("postprocess"):
+            content = _clean_report(response.choices[0].message.content)
+        _finish_brief(request, content, response.usage)
+        return content
+
+    except Exception as e:
+        return f"Error generating report: {str(e)}"
+
+def stream_brief(
+    company_name: str, 
+    website_content: str, 
+    news_results: list, 
+    mode: str = "Sales Outreach",
+    value_proposition: str = None,
+    job_description: str = None,
+    cv_text: str = None,
+    on_progress=None,
+    regenerate: bool = False,
+    map_reduce: bool = False
+):
+    """
+    Streaming variant of generate_brief. Yields cleaned report text chunks as
+    tokens arrive; joining all chunks gives the same report generate_brief returns.
+    Raises RuntimeError if the model call fails, since chunks already yielded
+    would otherwise look like a complete report.
+    """
+    request = _prepare_brief(
+        company_name, website_content, news_results, mode, value_proposition,
+        job_description, cv_text, on_progress, regenerate, map_reduce
+    )
+    if 'report' in request:
+        yield request['report']
+        return
+    client, prompt = request['client'], request['prompt']
+
+    cleaner = StreamCleaner()
+    parts = []
+    usage = None
+    # Spans can't stay open across yields, so time the stream manually
+    started = time.perf_counter()
+    first_token = None
+    cleaning = 0.0
+    outcome = "ok"
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o", 
+        stream = client.chat.completions.create(
+            model=MODEL, 
             messages=[
-                {"role": "system", "content": "You are a helpful and insightful strategic assistant."},
+                {"role": "system", "content": SYSTEM_MESSAGE},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3
+            temperature=TEMPERATURE,
+            stream=True,
+            stream_options={"include_usage": True}
         )
-        content = response.choices[0].message.content
-        
-        # Strip potential markdown code block wrapping
-        if content.startswith("```markdown"):
-            content = content.replace("```markdown", "").replace("```", "")
-        elif content.startswith("```"):
-             content = content.replace("```", "")
-        
-        # Remove all backticks to prevent inline code formatting (white background issue)
-        content = content.replace("`", "")
-             
+        for event in stream:
+            if getattr(event, 'usage', None):
+                usage = event.usage
+            if not event.choices:
+                continue
+            delta = event.choices[0].delta.content
+            if delta:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                clean_start = time.perf_counter()
+                text = cleaner.feed(delta)
+                cleaning += time.perf_counter() - clean_start
+                if text:
+                    parts.append(text)
+                    yield text
+        tail = cleaner.flush()
+        if tail:
+            parts.append(tail)
+            yield tail
+        _finish_brief(request, "".join(parts), usage)
+
+    except Exception as e:
+        outcome = "error"
+        raise RuntimeError(f"Error generating report: {str(e)}") from e
+
+    finally:
+        llm_span = metrics.Span("llm_call", run_id=metrics.current_run(), model=MODEL,
+                                time_to_first_token=first_token)
+        llm_span.duration = time.perf_counter() - started
+        llm_span.outcome = outcome
+        if usage:
+            llm_span.set_tokens(usage.prompt_tokens, usage.completion_tokens)
+        metrics.registry.record(llm_span)
+        metrics.record("postprocess", cleaning, outcome=outcome)
+
+def generate_comparison(
+    company_name: str,
+    briefs: list,
+    value_proposition: str = None,
+    on_progress=None,
+    regenerate: bool = False
+) -> str:
+    """
+    Writes a comparative synthesis of a target company against its competitors
+    from their individual briefs. `briefs` is a list of (company_name, brief)
+    pairs with the target first. Cached like generate_brief.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return "Error: OPENAI_API_KEY not found in environment variables."
+
+    client = _get_client(api_key)
+
+    val_prop_context = value_proposition if value_proposition and value_proposition.strip() else "Premium B2B Services"
+    usable = [(name, brief) for name, brief in briefs if brief and not brief.startswith("Error")]
+    briefs_text = "\n\n".join(f"=== {name} ===\n{brief}" for name, brief in usable)
+    prompt = COMPARISON_PROMPT.format(
+        company_name=company_name,
+        val_prop_context=val_prop_context,
+        briefs_text=briefs_text,
+        competitor_names=", ".join(name for name, _ in usable if name != company_name) or "Competitors",
+    )
+    prompt_tokens = count_tokens(SYSTEM_MESSAGE, MODEL) + count_tokens(prompt, MODEL)
+    message = f"Comparison prompt: {prompt_tokens:,} tokens from {len(usable)} briefs"
+    print(message)
+    if on_progress:
+        on_progress(message)
+
+    cache_key = _response_cache_key(MODEL, SYSTEM_MESSAGE, prompt, TEMPERATURE)
+    if not regenerate:
+        cached = _cached_response(cache_key, on_progress)
+        if cached is not None:
+            metrics.record("comparison_call", 0.0, outcome="cache_hit", model=MODEL)
+            return cached
+
+    try:
+        with metrics.span("comparison_call", model=MODEL) as span:
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_MESSAGE},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=TEMPERATURE
+            )
+            if response.usage:
+                span.set_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
+        content = _clean_report(response.choices[0].message.content)
+        _store_response(cache_key, content, response.usage, {'prompt_tokens': prompt_tokens})
         return content
 
     except Exception as e:
-        return f"Error generating report: {str(e)}"
+        return f"Error generating comparison: {str(e)}"
+
+def generate_delta_brief(
+    company_name: str,
+    previous_report: str,
+    previous_date: str,
+    new_items: list,
+    previous_updates: list = None,
+    mode: str = "Sales Outreach",
+    value_proposition: str = None,
+    job_description: str = None,
+    on_progress=None
+) -> str:
+    """
+    Writes a short "what changed" update to an existing report from only the
+    news that appeared since it. `previous_updates` are earlier update texts,
+    so developments are not reported twice. Cached like generate_brief.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return "Error: OPENAI_API_KEY not found in environment variables."
+
+    client = _get_client(api_key)
+
+    is_interview = "Interview" in mode
+    prompt = DELTA_BRIEF_PROMPT.format(
+        report_kind="interview strategy guide" if is_interview else "strategic account brief",
+        company_name=company_name,
+        previous_report=previous_report,
+        previous_date=previous_date,
+        previous_updates="\n\n".join(previous_updates or []) or "None.",
+        article_count=len(new_items),
+        news_text="\n".join(format_news_item(item) for item in new_items),
+        focus_label="JOB DESCRIPTION" if is_interview else "USER'S SOLUTION",
+        focus=(job_description if is_interview else value_proposition) or "Not provided",
+    )
+    prompt_tokens = count_tokens(SYSTEM_MESSAGE, MODEL) + count_tokens(prompt, MODEL)
+    message = f"Update prompt: {prompt_tokens:,} tokens for {len(new_items)} new articles"
+    print(message)
+    if on_progress:
+        on_progress(message)
+
+    cache_key = _response_cache_key(MODEL, SYSTEM_MESSAGE, prompt, TEMPERATURE)
+    cached = _cached_response(cache_key, on_progress)
+    if cached is not None:
+        metrics.record("delta_call", 0.0, outcome="cache_hit", model=MODEL)
+        return cached
+
+    try:
+        with metrics.span("delta_call", model=MODEL) as span:
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_MESSAGE},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=TEMPERATURE
+            )
+            if response.usage:
+                span.set_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
+        content = _clean_report(response.choices[0].message.content).strip()
+        _store_response(cache_key, content, response.usage, {'prompt_tokens': prompt_tokens})
+        return content
+
+    except Exception as e:
+        return f"Error generating update: {str(e)}"
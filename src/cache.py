@@ -0,0 +1,318 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse
+
+# Location of the on-disk cache. Shared by every Streamlit session and
+# process on the host, so colleagues researching the same domain reuse results.
+CACHE_DIR = os.getenv("B2B_CACHE_DIR", os.path.join(os.getcwd(), ".cache"))
+
+# Seconds before an entry is considered stale, per namespace.
+DEFAULT_TTLS = {
+    'website': int(os.getenv("B2B_CACHE_WEBSITE_TTL", 24 * 3600)),
+    'news': int(os.getenv("B2B_CACHE_NEWS_TTL", 6 * 3600)),
+    'llm': int(os.getenv("B2B_CACHE_LLM_TTL", 7 * 24 * 3600)),
+    'llm_map': int(os.getenv("B2B_CACHE_LLM_TTL", 7 * 24 * 3600)),
+    # Last report per company and inputs with its research fingerprint; see src/fingerprint.py
+    'llm_runs': int(os.getenv("B2B_CACHE_LLM_TTL", 7 * 24 * 3600)),
+    # Per-company monitoring state (previous report, seen articles); see src/monitor.py
+    'monitor': int(os.getenv("B2B_MONITOR_STATE_TTL", 90 * 24 * 3600)),
+    # Raw responses kept with their ETag/Last-Modified validators for conditional GETs
+    'http': int(os.getenv("B2B_CACHE_HTTP_TTL", 30 * 24 * 3600)),
+}
+FALLBACK_TTL = 6 * 3600
+
+# Total payload size kept on disk before least-recently-used entries are evicted.
+MAX_CACHE_BYTES = int(os.getenv("B2B_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+# Expired entries are purged on every this-many writes per process (LRU eviction only trims by size).
+PURGE_EVERY_WRITES = int(os.getenv("B2B_CACHE_PURGE_EVERY", 500))
+
+# Payloads at least this large are stored zlib-compressed.
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_LEVEL = 6
+
+# Separate cache files, so large research payloads never evict LLM responses (and vice versa).
+CACHE_SIZES = {
+    'research': MAX_CACHE_BYTES,
+    'llm': int(os.getenv("B2B_LLM_CACHE_MAX_BYTES", 100 * 1024 * 1024)),
+    'monitor': int(os.getenv("B2B_MONITOR_CACHE_MAX_BYTES", 50 * 1024 * 1024)),
+}
+
+
+def _encode(value):
+    """JSON text, or zlib-compressed JSON bytes (stored as a BLOB) for larger values."""
+    payload = json.dumps(value)
+    if len(payload) < COMPRESS_MIN_BYTES:
+        return payload
+    return zlib.compress(payload.encode('utf-8'), COMPRESS_LEVEL)
+
+
+def _decode(stored):
+    if isinstance(stored, bytes):
+        stored = zlib.decompress(stored).decode('utf-8')
+    return json.loads(stored)
+
+
+def normalize_domain_key(url: str) -> str:
+    """
+    Normalizes a URL for use as a cache key.
+    E.g., 'HTTPS://www.Salesforce.com/products/' -> 'salesforce.com/products'
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    if not url.lower().startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parsed = urlparse(url)
+    netloc = parsed.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    path = parsed.path.rstrip('/')
+    key = netloc + path
+    if parsed.query:
+        key += '?' + parsed.query
+    return key
+
+
+def normalize_query_key(query: str) -> str:
+    """Lowercases and collapses whitespace so trivially different queries share an entry."""
+    return " ".join((query or "").lower().split())
+
+
+class ResearchCache:
+    """
+    SQLite-backed key/value cache with per-namespace TTLs and size-based LRU eviction.
+
+    Values must be JSON-serializable. Larger payloads are stored zlib-compressed
+    (sizes and eviction count compressed bytes). Each thread gets its own connection and the
+    database runs in WAL mode, so concurrent readers and writers across sessions
+    and processes don't block each other for long.
+    """
+
+    def __init__(self, path: str, ttls: dict = None, max_bytes: int = MAX_CACHE_BYTES):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            # So INSERT OR REPLACE fires the delete trigger that keeps entry_totals in step
+            conn.execute("PRAGMA recursive_triggers=ON")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed)")
+        # Running total of payload bytes, kept by triggers so eviction checks don't
+        # scan the whole table on every write (and stay right across processes)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entry_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                bytes INTEGER NOT NULL
+            )
+        """)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR IGNORE INTO entry_totals (id, bytes) "
+                         "SELECT 0, COALESCE(SUM(size), 0) FROM entries")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS entries_size_insert AFTER INSERT ON entries "
+                         "BEGIN UPDATE entry_totals SET bytes = bytes + NEW.size WHERE id = 0; END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS entries_size_delete AFTER DELETE ON entries "
+                         "BEGIN UPDATE entry_totals SET bytes = bytes - OLD.size WHERE id = 0; END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS entries_size_update AFTER UPDATE OF size ON entries "
+                         "BEGIN UPDATE entry_totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 0; END")
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS counters (
+                namespace TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS metrics (
+                namespace TEXT NOT NULL,
+                name TEXT NOT NULL,
+                value REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (namespace, name)
+            )
+        """)
+
+    def _count(self, namespace: str, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        column = "hits" if hit else "misses"
+        try:
+            self._connect().execute(
+                f"INSERT INTO counters (namespace, {column}) VALUES (?, 1) "
+                f"ON CONFLICT(namespace) DO UPDATE SET {column} = {column} + 1",
+                (namespace,)
+            )
+        except sqlite3.Error as e:
+            print(f"Cache counter update failed: {e}")
+
+    def add_metric(self, namespace: str, name: str, amount: float):
+        """Adds to a named host-wide counter (e.g. tokens saved by cache hits)."""
+        try:
+            self._connect().execute(
+                "INSERT INTO metrics (namespace, name, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(namespace, name) DO UPDATE SET value = value + excluded.value",
+                (namespace, name, amount)
+            )
+        except sqlite3.Error as e:
+            print(f"Cache metric update failed: {e}")
+
+    def get(self, namespace: str, key: str):
+        """Returns the cached value, or None on a miss or expired entry."""
+        ttl = self.ttls.get(namespace, FALLBACK_TTL)
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None or now - row[1] > ttl:
+                self._count(namespace, hit=False)
+                return None
+            conn.execute(
+                "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key)
+            )
+            self._count(namespace, hit=True)
+            return _decode(row[0])
+        except (sqlite3.Error, ValueError, zlib.error) as e:
+            print(f"Cache read failed for {namespace}:{key}: {e}")
+            return None
+
+    def set(self, namespace: str, key: str, value):
+        """
+        Stores a value and evicts least-recently-used entries if over the size
+        limit. Every PURGE_EVERY_WRITES writes, expired entries are purged too.
+        """
+        payload = _encode(value)
+        now = time.time()
+        with self._lock:
+            self._writes += 1
+            purge = PURGE_EVERY_WRITES > 0 and self._writes % PURGE_EVERY_WRITES == 0
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, payload, len(payload), now, now)
+            )
+            if purge:
+                self.purge_expired()
+            self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"Cache write failed for {namespace}:{key}: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        # Cheap check first; most writes leave the cache under its limit
+        if conn.execute("SELECT bytes FROM entry_totals WHERE id = 0").fetchone()[0] <= self.max_bytes:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another process may have just evicted
+            total = conn.execute("SELECT bytes FROM entry_totals WHERE id = 0").fetchone()[0]
+            cursor = conn.execute("SELECT namespace, key, size FROM entries ORDER BY accessed ASC")
+            doomed = []
+            for namespace, key, size in cursor:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((namespace, key))
+                total -= size
+            conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def purge_expired(self):
+        """Deletes all entries older than their namespace TTL."""
+        now = time.time()
+        conn = self._connect()
+        namespaces = [r[0] for r in conn.execute("SELECT DISTINCT namespace FROM entries")]
+        for namespace in namespaces:
+            ttl = self.ttls.get(namespace, FALLBACK_TTL)
+            conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND created < ?",
+                (namespace, now - ttl)
+            )
+
+    def stats(self) -> dict:
+        """Returns process-local and host-wide hit/miss counts plus current size."""
+        conn = self._connect()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        per_namespace = {
+            namespace: {'hits': hits, 'misses': misses}
+            for namespace, hits, misses in conn.execute("SELECT namespace, hits, misses FROM counters")
+        }
+        for namespace, name, value in conn.execute("SELECT namespace, name, value FROM metrics"):
+            per_namespace.setdefault(namespace, {'hits': 0, 'misses': 0})[name] = value
+        return {
+            'process_hits': self.hits,
+            'process_misses': self.misses,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'namespaces': per_namespace,
+        }
+
+
+_caches = {}
+_cache_lock = threading.Lock()
+
+
+def get_cache(name: str = "research") -> ResearchCache:
+    """Returns the process-wide cache instance for `name`, creating it on first use."""
+    cache = _caches.get(name)
+    if cache is None:
+        with _cache_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = ResearchCache(
+                    path=os.path.join(CACHE_DIR, f"{name}.sqlite3"),
+                    max_bytes=CACHE_SIZES.get(name, MAX_CACHE_BYTES)
+                )
+                _caches[name] = cache
+    return cache
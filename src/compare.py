@@ -0,0 +1,118 @@
+"""
+Competitive comparison: research a target and its competitors side by side.
+
+Every company is researched at the same time. All website and RSS fetches
+go through the process-wide HTTP client (src.http_client), so they share
+one connection pool and its per-host concurrency limits. Total wall time is
+therefore close to the slowest single company rather than the sum.
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .pipeline import run_research, RESEARCH_DEADLINE
+from .analyzer import generate_brief, generate_comparison
+from .cache import normalize_domain_key
+from .utils import extract_company_name
+from . import metrics
+
+MAX_COMPANIES = 6
+# Individual briefs written at once. Each is one LLM call, so this mostly bounds API concurrency.
+BRIEF_CONCURRENCY = 4
+
+
+def parse_company_urls(text: str, max_companies: int = MAX_COMPANIES) -> list:
+    """Splits newline/comma separated URLs, dropping blanks and duplicate domains."""
+    urls = []
+    seen = set()
+    for raw in (text or "").replace(",", "\n").splitlines():
+        url = raw.strip()
+        key = normalize_domain_key(url)
+        if url and key not in seen:
+            seen.add(key)
+            urls.append(url)
+    return urls[:max_companies]
+
+
+def research_companies(urls: list, deadline: float = RESEARCH_DEADLINE, on_progress=None,
+                       refresh: bool = False, crawl: bool = False, reuse: dict = None) -> list:
+    """
+    Researches all companies concurrently. Returns research bundles in the
+    order of `urls` (see pipeline.run_research).
+
+    `reuse` may map a URL to an already fetched bundle, which is used as is.
+    `on_progress` is called from the calling thread as each company finishes.
+    """
+    reuse = reuse or {}
+    bundles = {url: reuse[url] for url in urls if url in reuse}
+    pending = [url for url in urls if url not in bundles]
+    if on_progress and bundles:
+        on_progress(f"Reusing research for {len(bundles)} of {len(urls)} companies.")
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="compare") as pool:
+            futures = {
+                pool.submit(
+                    contextvars.copy_context().run, run_research, url,
+                    company_name=extract_company_name(url) or "Target Company",
+                    deadline=deadline, refresh=refresh, crawl=crawl,
+                ): url
+                for url in pending
+            }
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    bundle = future.result()
+                except Exception as e:
+                    print(f"Research failed for {url}: {e}")
+                    bundle = {
+                        'company_name': extract_company_name(url) or url,
+                        'website_content': "Website content unavailable.",
+                        'news_results': [],
+                        'source_status': {},
+                        'elapsed': 0.0,
+                    }
+                bundles[url] = bundle
+                if on_progress:
+                    on_progress(f"{bundle['company_name']}: researched in {bundle['elapsed']:.1f}s "
+                                f"({len(bundle['news_results'])} news items)")
+
+    return [bundles[url] for url in urls]
+
+
+def compare_companies(bundles: list, mode: str = "Target Account Research", value_proposition: str = None,
+                      on_progress=None, regenerate: bool = False, map_reduce: bool = False) -> dict:
+    """
+    Writes a brief per company (in parallel) and a comparative synthesis.
+    The first bundle is the target.
+
+    Returns {'briefs': [(company_name, brief)], 'comparison': str, 'elapsed': float}.
+    """
+    start = time.monotonic()
+
+    def brief(bundle):
+        return generate_brief(
+            company_name=bundle['company_name'],
+            website_content=bundle['website_content'],
+            news_results=bundle['news_results'],
+            mode=mode,
+            value_proposition=value_proposition,
+            regenerate=regenerate,
+            map_reduce=map_reduce,
+        )
+
+    with metrics.span("comparison", companies=len(bundles)):
+        with ThreadPoolExecutor(max_workers=BRIEF_CONCURRENCY, thread_name_prefix="brief") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, brief, b) for b in bundles]
+            briefs = []
+            for bundle, future in zip(bundles, futures):
+                briefs.append((bundle['company_name'], future.result()))
+                if on_progress:
+                    on_progress(f"Brief ready: {bundle['company_name']}")
+
+        comparison = generate_comparison(
+            bundles[0]['company_name'], briefs,
+            value_proposition=value_proposition, on_progress=on_progress, regenerate=regenerate,
+        )
+
+    return {'briefs': briefs, 'comparison': comparison, 'elapsed': time.monotonic() - start}
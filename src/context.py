@@ -0,0 +1,205 @@
+"""
+Token-budgeted, relevance-ranked context assembly for prompts.
+
+Website text and news items are split into chunks, scored against the
+user's value proposition or job description with BM25, and the best
+chunks are packed into a per-model token budget. Selected chunks keep
+their original order so the prompt still reads naturally.
+"""
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+# Tokens available for website + news context, per model. The rest of the
+# context window is left for the prompt template, JD/CV and the completion.
+CONTEXT_BUDGETS = {
+    'gpt-4o': 6000,
+    'gpt-4o-mini': 6000,
+    'gpt-4.1': 8000,
+    'gpt-4.1-mini': 8000,
+}
+DEFAULT_CONTEXT_BUDGET = 4000
+
+# Interview prompts also carry the JD and CV, so research gets a smaller share.
+INTERVIEW_BUDGET_FACTOR = 0.75
+
+# Upper bound on the share of the budget spent on news; unused news budget goes to the website.
+NEWS_BUDGET_SHARE = 0.35
+
+CHUNK_TOKENS = 200
+
+# Used when the user gives no value proposition, to favour buying-signal content.
+DEFAULT_SALES_QUERY = ("company products services customers solutions platform industry "
+                       "growth expansion acquisition funding partnership launch strategy")
+DEFAULT_INTERVIEW_QUERY = ("company mission products customers strategy growth team "
+                           "hiring leadership culture expansion funding")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the to was were will with
+we our you your they their this these those not but can all more about into over than also
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=8)
+def _get_encoder(model: str):
+    """Returns a tiktoken encoder for the model, or None if tiktoken or its data is unavailable."""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"Exact token counting unavailable ({e}); using an estimate.")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Counts tokens exactly with tiktoken, falling back to a ~4 chars/token estimate."""
+    if not text:
+        return 0
+    encoder = _get_encoder(model)
+    if encoder is None:
+        return math.ceil(len(text) / 4)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def context_budget(model: str, mode: str) -> int:
+    budget = CONTEXT_BUDGETS.get(model, DEFAULT_CONTEXT_BUDGET)
+    if "Interview" in (mode or ""):
+        budget = int(budget * INTERVIEW_BUDGET_FACTOR)
+    return budget
+
+
+def _tokenize(text: str) -> list:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS, model: str = "gpt-4o") -> list:
+    """
+    Splits website text into chunks of whole lines up to `max_tokens` each.
+    Crawled '=== Source: ... ===' headers always start a new chunk.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for line in (text or "").splitlines():
+        line_tokens = count_tokens(line, model) + 1
+        starts_source = line.startswith("=== Source:")
+        if current and (starts_source or current_tokens + line_tokens > max_tokens):
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        if line_tokens > max_tokens:
+            # A single enormous line (e.g. minified text): hard-split by characters
+            step = max_tokens * 4
+            for i in range(0, len(line), step):
+                chunks.append(line[i:i + step])
+            continue
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def bm25_scores(query: str, documents: list, k1: float = 1.5, b: float = 0.75) -> list:
+    """Scores each document against the query with Okapi BM25."""
+    query_terms = set(_tokenize(query))
+    tokenized = [_tokenize(d) for d in documents]
+    if not documents or not query_terms:
+        return [0.0] * len(documents)
+
+    n = len(documents)
+    avg_len = sum(len(t) for t in tokenized) / n or 1.0
+    df = Counter()
+    for terms in tokenized:
+        df.update(set(terms) & query_terms)
+
+    scores = []
+    for terms in tokenized:
+        tf = Counter(terms)
+        length_norm = k1 * (1 - b + b * len(terms) / avg_len)
+        score = 0.0
+        for term in query_terms:
+            if tf[term]:
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf[term] * (k1 + 1) / (tf[term] + length_norm)
+        scores.append(score)
+    return scores
+
+
+def _pack(items: list, scores: list, budget: int, position_weight: float) -> tuple:
+    """
+    Greedily picks the highest-scoring (item, tokens) pairs that fit the budget.
+    Earlier items get a small bonus, since the top of a page or feed tends to matter most.
+    Returns (selected indices in original order, tokens used).
+    """
+    n = len(items)
+    ranked = sorted(
+        range(n),
+        key=lambda i: scores[i] + position_weight * (1 - i / max(n, 1)),
+        reverse=True
+    )
+    selected = []
+    used = 0
+    for i in ranked:
+        tokens = items[i][1]
+        if used + tokens <= budget:
+            selected.append(i)
+            used += tokens
+    return sorted(selected), used
+
+
+def format_news_item(item: dict) -> str:
+    title = item.get('title', 'No Title')
+    link = item.get('href', item.get('link', ''))
+    snippet = item.get('body', item.get('snippet', 'No snippet'))
+    return f"- {title}: {snippet} ({link})" if link else f"- {title}: {snippet}"
+
+
+def assemble_context(
+    website_content: str,
+    news_results: list,
+    query: str = None,
+    mode: str = "Sales Outreach",
+    model: str = "gpt-4o",
+    budget: int = None
+) -> dict:
+    """
+    Packs the most relevant website chunks and news items into a token budget.
+
+    Returns:
+        {
+            'website_content': str,   # selected chunks, original order
+            'news_results': list,     # selected items, original order
+            'website_tokens': int,
+            'news_tokens': int,
+            'budget': int,
+            'website_chunks': (used, total),
+        }
+    """
+    budget = budget or context_budget(model, mode)
+    if not query or not query.strip():
+        query = DEFAULT_INTERVIEW_QUERY if "Interview" in (mode or "") else DEFAULT_SALES_QUERY
+
+    news_results = news_results or []
+    news_items = [(item, count_tokens(format_news_item(item), model) + 1) for item in news_results]
+    news_scores = bm25_scores(query, [format_news_item(item) for item in news_results])
+    news_idx, news_tokens = _pack(news_items, news_scores, int(budget * NEWS_BUDGET_SHARE), position_weight=0.5)
+
+    chunks = chunk_text(website_content, model=model)
+    chunk_items = [(c, count_tokens(c, model) + 1) for c in chunks]
+    chunk_scores = bm25_scores(query, chunks)
+    chunk_idx, website_tokens = _pack(chunk_items, chunk_scores, budget - news_tokens, position_weight=1.0)
+
+    return {
+        'website_content': "\n".join(chunks[i] for i in chunk_idx),
+        'news_results': [news_results[i] for i in news_idx],
+        'website_tokens': website_tokens,
+        'news_tokens': news_tokens,
+        'budget': budget,
+        'website_chunks': (len(chunk_idx), len(chunks)),
+    }
@@ -0,0 +1,231 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+
+from .extract import extract_page
+from .feeds import discover_feeds
+from .http_client import get_client, HostLimiter
+from .researcher import _conditional_get
+
+# Path keywords that usually lead to pages worth feeding the brief, with weights.
+PAGE_KEYWORDS = {
+    'about': 6, 'who-we-are': 6, 'company': 3, 'leadership': 3,
+    'product': 5, 'solution': 5, 'platform': 4, 'service': 4, 'pricing': 2,
+    'customer': 5, 'case-stud': 5, 'success-stor': 4, 'client': 3,
+    'news': 5, 'press': 5, 'newsroom': 6, 'media': 2, 'blog': 1,
+    'career': 4, 'jobs': 3,
+    'investor': 3, 'partner': 2,
+}
+
+# Paths that never add useful context.
+SKIP_KEYWORDS = ('login', 'signin', 'sign-in', 'signup', 'register', 'cart', 'checkout',
+                 'privacy', 'cookie', 'terms', 'legal', 'account', 'search')
+
+SKIP_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.zip',
+                   '.mp4', '.mp3', '.css', '.js', '.xml', '.json', '.ico')
+
+TRACKING_PARAMS = ('utm_', 'gclid', 'fbclid', 'mc_cid', 'mc_eid', 'hsctatracking', '_hs', 'ref')
+
+MAX_PAGES = 6
+MAX_TOTAL_BYTES = 3 * 1024 * 1024
+MAX_PAGE_BYTES = 1024 * 1024
+MAX_CHARS_PER_PAGE = 6000
+CRAWL_DEADLINE = 15
+PER_HOST_LIMIT = 3
+
+
+def _site_root(host: str) -> str:
+    host = (host or "").lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+def canonicalize_url(url: str, base: str = None) -> str:
+    """
+    Resolves a link against `base` and normalizes it for deduplication:
+    lowercase scheme/host, no fragment, no tracking params, no trailing slash.
+    Returns "" for non-HTTP links.
+    """
+    if not url:
+        return ""
+    if base:
+        url = urljoin(base, url.strip())
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https'):
+        return ""
+    query = urlencode([
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ])
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, '', query, ''))
+
+
+def _same_site(url: str, root: str) -> bool:
+    host = _site_root(urlparse(url).netloc)
+    return host == root or host.endswith('.' + root)
+
+
+def _score_link(url: str, anchor_text: str) -> int:
+    """Scores a candidate link by how likely it is to describe the business."""
+    path = urlparse(url).path.lower()
+    if path in ('', '/') or path.endswith(SKIP_EXTENSIONS):
+        return 0
+    if any(k in path for k in SKIP_KEYWORDS):
+        return 0
+    haystack = path + ' ' + (anchor_text or '').lower().replace(' ', '-')
+    score = sum(weight for keyword, weight in PAGE_KEYWORDS.items() if keyword in haystack)
+    # Prefer section landing pages over deep article URLs
+    depth = len([p for p in path.split('/') if p])
+    return score - max(0, depth - 2) if score else 0
+
+
+class _ByteBudget:
+    def __init__(self, total: int):
+        self.remaining = total
+        self._lock = threading.Lock()
+
+    def take(self, n: int):
+        with self._lock:
+            self.remaining -= n
+
+
+def _fetch_page(url: str, headers: dict, limiter: HostLimiter, budget: _ByteBudget, timeout: float,
+                collect_links: bool, max_chars: int) -> dict:
+    """
+    Fetches and parses a page with a size cap, revalidating an unchanged page
+    instead of downloading it again (see _conditional_get). Returns _parse_page's
+    dict plus 'url', the final URL; 'text' is empty for non-HTML responses.
+    """
+    with limiter.get(url):
+        cap = min(MAX_PAGE_BYTES, max(budget.remaining, 0))
+        if cap <= 0:
+            return {'url': url, 'canonical': canonicalize_url(url), 'text': "", 'links': [], 'feeds': []}
+
+        downloaded = []
+
+        def parse(response):
+            downloaded.append(len(response.content))
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and 'html' not in content_type:
+                page = {'canonical': canonicalize_url(response.url), 'text': "", 'links': [], 'feeds': []}
+            else:
+                page = _parse_page(response.text, response.url, collect_links, max_chars)
+            page['url'] = response.url
+            page['bytes'] = len(response.content)
+            return page
+
+        kind = f"crawl:{'home' if collect_links else 'page'}:{max_chars}"
+        page = _conditional_get(url, parse, kind=kind, timeout=timeout, max_bytes=cap, headers=headers)
+        # A revalidated page is charged its original size, so the crawl covers the same pages as a fresh one
+        budget.take(downloaded[0] if downloaded else page.get('bytes', 0))
+        return page
+
+
+def _parse_page(html: str, base_url: str, collect_links: bool, max_chars: int) -> dict:
+    """Parses a page once, returning its canonical URL, visible text and (optionally) links."""
+    page = extract_page(html, max_chars, collect_links=collect_links)
+    canonical = canonicalize_url(page['canonical'], base_url) if page['canonical'] else ""
+    return {
+        'canonical': canonical or canonicalize_url(base_url),
+        'text': page['text'],
+        'links': page['links'],
+        'feeds': discover_feeds(html, base_url) if collect_links else [],
+    }
+
+
+def crawl_website(
+    url: str,
+    max_pages: int = MAX_PAGES,
+    max_bytes: int = MAX_TOTAL_BYTES,
+    deadline: float = CRAWL_DEADLINE,
+    per_host_limit: int = PER_HOST_LIMIT,
+    max_chars_per_page: int = MAX_CHARS_PER_PAGE
+) -> list:
+    """
+    Crawls the homepage plus the highest-value same-domain pages it links to.
+
+    Enforces a page budget, a total byte budget, a per-host concurrency limit
+    and an overall deadline. Pages are deduplicated by canonical URL, and
+    unchanged ones are revalidated with ETag/Last-Modified, not downloaded again.
+    Returns a list of {'url': str, 'text': str} dicts, homepage first; the
+    homepage's also has 'feeds', the RSS/Atom URLs it advertises.
+    """
+    start = time.monotonic()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    # Keep one user agent for the whole crawl so the site sees a consistent visitor
+    headers = {'User-Agent': get_client().random_user_agent()}
+    limiter = HostLimiter(per_host_limit)
+    budget = _ByteBudget(max_bytes)
+
+    def time_left():
+        return deadline - (time.monotonic() - start)
+
+    try:
+        home = _fetch_page(url, headers, limiter, budget, min(10, time_left()),
+                           collect_links=True, max_chars=max_chars_per_page)
+        final_url = home['url']
+    except Exception as e:
+        print(f"Error crawling {url}: {e}")
+        return []
+
+    pages = [{'url': final_url, 'text': home['text'], 'feeds': home['feeds']}]
+    seen = {canonicalize_url(url), canonicalize_url(final_url), home['canonical']}
+    root = _site_root(urlparse(final_url).netloc)
+
+    # Rank candidate links, keeping the best anchor per canonical URL
+    candidates = {}
+    for href, anchor in home['links']:
+        link = canonicalize_url(href, final_url)
+        if not link or link in seen or not _same_site(link, root):
+            continue
+        score = _score_link(link, anchor)
+        if score > candidates.get(link, 0):
+            candidates[link] = score
+    queue = sorted(candidates, key=candidates.get, reverse=True)
+
+    executor = ThreadPoolExecutor(max_workers=max(per_host_limit, 1) * 2)
+    in_flight = {}
+    try:
+        while (queue or in_flight) and time_left() > 0:
+            while queue and len(pages) + len(in_flight) < max_pages and budget.remaining > 0:
+                link = queue.pop(0)
+                seen.add(link)
+                # Copy the context so page bytes are attributed to the caller's scrape span
+                future = executor.submit(contextvars.copy_context().run, _fetch_page,
+                                         link, headers, limiter, budget, min(10, max(time_left(), 1)),
+                                         False, max_chars_per_page)
+                in_flight[future] = link
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, timeout=time_left(), return_when=FIRST_COMPLETED)
+            for future in done:
+                link = in_flight.pop(future)
+                try:
+                    page = future.result()
+                except Exception as e:
+                    print(f"Error crawling {link}: {e}")
+                    continue
+                if not page['text']:
+                    continue
+                if page['canonical'] in seen and page['canonical'] != link:
+                    continue
+                seen.add(page['canonical'])
+                if page['text'] and len(pages) < max_pages:
+                    pages.append({'url': page['url'], 'text': page['text']})
+
+        if in_flight:
+            print(f"Crawl deadline reached for {url}, abandoning {len(in_flight)} page(s)")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return pages
+
+
+def format_pages(pages: list) -> str:
+    """Joins crawled pages into a single text block with a source header per page."""
+    return "\n\n".join(f"=== Source: {p['url']} ===\n{p['text']}" for p in pages if p.get('text'))
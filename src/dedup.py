@@ -0,0 +1,274 @@
+"""
+Near-duplicate detection for news results.
+
+URLs are canonicalized (tracking params stripped, known redirect wrappers
+unwrapped, scheme and 'www.' ignored) and titles/snippets are fingerprinted
+with MinHash. Candidate pairs are found with banded LSH and confirmed with
+exact Jaccard similarity, so the whole pass stays roughly linear in the
+number of results. (SimHash was too noisy on headline-length text.)
+"""
+import base64
+import hashlib
+import random
+import re
+from urllib.parse import urlparse, parse_qsl, urlencode, unquote
+
+NUM_PERMUTATIONS = 32
+BANDS = 8                  # 8 bands x 4 rows: pairs above ~0.8 Jaccard share a band ~98% of the time
+SIMILARITY_THRESHOLD = 0.8
+# Below this many words a one-word difference ("Q1" vs "Q2", "CEO" vs "CFO") is most
+# of the text, so shorter items are only merged on identical titles or canonical URLs.
+MIN_FUZZY_SHINGLES = 6
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)  # Fixed seed so fingerprints are stable across processes
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+# Function words only: anything that can tell two stories apart (numbers, quarters,
+# role titles, "new") is kept.
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the to was were will with
+says said their this
+""".split())
+
+TRACKING_PREFIXES = ('utm_', 'mc_', '_hs', 'pk_', 'vero_')
+TRACKING_PARAMS = frozenset([
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'ocid', 'cmpid', 'cmp',
+    'ref', 'ref_src', 'referrer', 'src', 'source', 'feature', 'spm', 'smid', 'smtyp', 'taid', 'guccounter',
+])
+
+# (host suffix, path prefix, query parameter holding the real URL)
+REDIRECT_WRAPPERS = [
+    ('duckduckgo.com', '/l/', 'uddg'),
+    ('google.com', '/url', 'q'),
+    ('google.com', '/url', 'url'),
+    ('news.google.com', '/url', 'url'),
+    ('bing.com', '/news/apiclick.aspx', 'url'),
+    ('l.facebook.com', '/l.php', 'u'),
+    ('lnkd.in', '/', 'url'),
+    ('linkedin.com', '/redir/redirect', 'url'),
+]
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_URL_IN_BYTES_RE = re.compile(rb"https?://[\x21-\x7e]+")
+# Google News titles end with " - Publisher"
+_PUBLISHER_SUFFIX_RE = re.compile(r"\s+[-|–—]\s+[^-|–—]{2,60}$")
+
+
+def _decode_google_news_link(url: str) -> str:
+    """
+    Older Google News RSS article IDs are base64-encoded protobufs that embed
+    the publisher URL. Returns it when present, else "".
+    """
+    parsed = urlparse(url)
+    if not parsed.netloc.endswith('news.google.com') or '/articles/' not in parsed.path:
+        return ""
+    article_id = parsed.path.rsplit('/', 1)[-1]
+    try:
+        raw = base64.urlsafe_b64decode(article_id + '=' * (-len(article_id) % 4))
+    except (ValueError, TypeError):
+        return ""
+    match = _URL_IN_BYTES_RE.search(raw)
+    return match.group(0).decode('ascii', errors='ignore') if match else ""
+
+
+def unwrap_redirect(url: str) -> str:
+    """Resolves known redirect wrappers (DDG, Google, Bing, ...) to the target URL."""
+    for _ in range(3):  # Wrappers are occasionally nested
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        target = ""
+        for host_suffix, path_prefix, param in REDIRECT_WRAPPERS:
+            if host.endswith(host_suffix) and parsed.path.startswith(path_prefix):
+                target = dict(parse_qsl(parsed.query)).get(param, "")
+                if target:
+                    break
+        if not target:
+            target = _decode_google_news_link(url)
+        if not target or not target.startswith(('http://', 'https://', '//')):
+            return url
+        url = unquote(target) if '%3A' in target[:12].upper() else target
+    return url
+
+
+def canonicalize_news_url(url: str) -> str:
+    """
+    Returns a scheme-less canonical form for comparing article URLs.
+    E.g., 'https://www.Example.com/a/?utm_source=x#top' -> 'example.com/a'
+    """
+    if not url:
+        return ""
+    url = unwrap_redirect(url.strip())
+    if url.startswith('//'):
+        url = 'https:' + url
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if host.startswith('m.') or host.startswith('amp.'):
+        host = host.split('.', 1)[1]
+    path = parsed.path
+    if path.endswith('/amp'):
+        path = path[:-4]
+    path = path.rstrip('/')
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES) and k.lower() != 'amp'
+    ))
+    return host + path + ('?' + query if query else '')
+
+
+def _strip_publisher(title: str) -> str:
+    return _PUBLISHER_SUFFIX_RE.sub("", title or "")
+
+
+def _shingles(text: str) -> set:
+    return {w for w in _WORD_RE.findall((text or "").lower()) if w not in STOPWORDS}
+
+
+def minhash(shingles: set) -> tuple:
+    """MinHash signature of a word set (empty tuple for no words)."""
+    if not shingles:
+        return ()
+    hashed = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+        for s in shingles
+    ]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashed)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def news_fingerprints(item: dict) -> list:
+    """
+    Stable fingerprints for remembering an article across runs: one for its
+    canonical URL and, for titles with enough words, one for the title's word
+    set (catches the same story behind a different redirect or syndicated URL).
+    """
+    fingerprints = []
+    canonical = canonicalize_news_url(item.get('href', item.get('link', '')))
+    if canonical:
+        fingerprints.append("u:" + hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16])
+    words = _shingles(_strip_publisher(item.get('title', '')))
+    if len(words) >= 4:
+        fingerprints.append("t:" + hashlib.sha1(" ".join(sorted(words)).encode('utf-8')).hexdigest()[:16])
+    return fingerprints
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _fingerprint_text(item: dict) -> str:
+    title = _strip_publisher(item.get('title', ''))
+    body = item.get('body', item.get('snippet', '')) or ''
+    # RSS bodies are "<pubDate> - <title>", which adds nothing beyond the title
+    if item.get('source') == 'Google News RSS':
+        body = ''
+    return f"{title} {body}"
+
+
+def topic_terms(item: dict, exclude: set = frozenset()) -> set:
+    """
+    The distinctive words of an article's title and snippet, minus `exclude`
+    (e.g. the company name), for grouping related stories rather than duplicates.
+    """
+    return _shingles(_fingerprint_text(item)) - exclude
+
+
+def _quality(item: dict, canonical: str) -> tuple:
+    """Ranks cluster members: prefer resolved publisher URLs, then richer snippets."""
+    link = item.get('href', item.get('link', '')) or ''
+    is_wrapper = 'news.google.com' in link or canonical.startswith('news.google.com')
+    body = item.get('body', item.get('snippet', '')) or ''
+    return (not is_wrapper, item.get('source') != 'Google News RSS', len(body))
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # Keep the earliest index as root so cluster order follows first appearance
+            if rb < ra:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+
+def dedupe_news(results: list, threshold: float = SIMILARITY_THRESHOLD) -> list:
+    """
+    Collapses exact-URL, identical-title and near-duplicate news items into
+    clusters and returns the best representative of each, in order of first
+    appearance. Near-duplicate matching needs MIN_FUZZY_SHINGLES words per item.
+    Each representative gets a 'duplicates' count of the items it replaced.
+    """
+    items = [r for r in results if r.get('href') or r.get('link')]
+    n = len(items)
+    if n == 0:
+        return []
+
+    uf = _UnionFind(n)
+    canonicals = [canonicalize_news_url(item.get('href', item.get('link', ''))) for item in items]
+
+    by_url = {}
+    for i, canonical in enumerate(canonicals):
+        if canonical in by_url:
+            uf.union(by_url[canonical], i)
+        else:
+            by_url[canonical] = i
+
+    by_title = {}
+    for i, item in enumerate(items):
+        title = " ".join(_WORD_RE.findall(_strip_publisher(item.get('title', '')).lower()))
+        if not title:
+            continue
+        if title in by_title:
+            uf.union(by_title[title], i)
+        else:
+            by_title[title] = i
+
+    shingles = [_shingles(_fingerprint_text(item)) for item in items]
+    rows = NUM_PERMUTATIONS // BANDS
+    buckets = {}
+    for i, words in enumerate(shingles):
+        if len(words) < MIN_FUZZY_SHINGLES:
+            continue  # Too short to tell stories apart by overlap
+        signature = minhash(words)
+        if not signature:
+            continue  # No text to compare
+        for band in range(BANDS):
+            key = (band, signature[band * rows:(band + 1) * rows])
+            for j in buckets.get(key, ()):
+                if uf.find(i) != uf.find(j) and _jaccard(words, shingles[j]) >= threshold:
+                    uf.union(i, j)
+            buckets.setdefault(key, []).append(i)
+
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(uf.find(i), []).append(i)
+
+    deduped = []
+    for root in sorted(clusters):
+        members = clusters[root]
+        best = max(members, key=lambda i: _quality(items[i], canonicals[i]))
+        item = dict(items[best])
+        if len(members) > 1:
+            item['duplicates'] = len(members) - 1
+        deduped.append(item)
+    return deduped
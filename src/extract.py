@@ -0,0 +1,235 @@
+"""
+Pluggable HTML-to-text extraction.
+
+Every engine produces the same normalization as the original scraper:
+visible text with script/style/nav/footer removed, one stripped phrase per
+line, blank lines dropped, truncated to `max_chars`. The streaming engines
+stop parsing as soon as the character budget is filled.
+"""
+import os
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+MAX_PAGE_CHARS = 15000
+SKIP_TAGS = frozenset(["script", "style", "nav", "footer"])
+FEED_SIZE = 32 * 1024
+
+# "auto" picks lxml when installed, otherwise the stdlib streaming tokenizer.
+DEFAULT_ENGINE = os.getenv("B2B_EXTRACT_ENGINE", "auto")
+
+ENGINES = {}
+
+
+def register_engine(name: str):
+    """Decorator registering an extract_page(html, max_chars, collect_links) implementation."""
+    def wrap(fn):
+        ENGINES[name] = fn
+        return fn
+    return wrap
+
+
+def _normalize(text: str, max_chars: int) -> str:
+    # Break into lines and remove leading/trailing space on each
+    lines = (line.strip() for line in text.splitlines())
+    # Break multi-headlines into a line each
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    # Drop blank lines
+    return '\n'.join(chunk for chunk in chunks if chunk)[:max_chars]
+
+
+@lru_cache(maxsize=1)
+def _lxml_etree():
+    """lxml.etree, or None if lxml is not installed. Imported on first extraction, not at startup."""
+    try:
+        from lxml import etree
+    except ImportError:  # lxml is optional
+        return None
+    return etree
+
+
+def soup_to_text(soup: "BeautifulSoup", max_chars: int = MAX_PAGE_CHARS) -> str:
+    """Returns the normalized visible text of a parsed page (mutates the soup)."""
+    # Remove script and style elements
+    for script in soup(list(SKIP_TAGS)):
+        script.decompose()
+    return _normalize(soup.get_text(), max_chars)
+
+
+class _TextCollector:
+    """
+    Parser target shared by the streaming engines. Receives start/end/data
+    events in document order and normalizes text incrementally, so the
+    caller can stop feeding once `done` is set.
+    """
+
+    def __init__(self, max_chars: int, collect_links: bool):
+        self.max_chars = max_chars
+        self.collect_links = collect_links
+        self.skip_depth = 0
+        self.partial = ""
+        self.chunks = []
+        self.length = 0
+        self.done = False
+        self.canonical = ""
+        self.links = []
+        self._anchor = None  # [href, [text parts]] for the <a> currently open
+
+    def start(self, tag, attrs):
+        tag = tag.lower()
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == "link" and self.canonical == "":
+            attrs = dict(attrs)
+            if "canonical" in (attrs.get("rel") or "").lower().split():
+                self.canonical = attrs.get("href") or ""
+        elif tag == "a" and self.collect_links:
+            href = dict(attrs).get("href")
+            if href:
+                self._anchor = [href, []]
+                self.links.append(self._anchor)
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag == "a":
+            self._anchor = None
+
+    def data(self, text):
+        if self._anchor is not None:
+            self._anchor[1].append(text)
+        if self.skip_depth or self.done:
+            return
+        pieces = (self.partial + text).splitlines(keepends=True)
+        # A last piece with no line break yet may still be joined by later text
+        self.partial = ""
+        if pieces and pieces[-1].splitlines()[0] == pieces[-1]:
+            self.partial = pieces.pop()
+        for line in pieces:
+            self._add_line(line)
+            if self.done:
+                break
+
+    def _add_line(self, line: str):
+        for phrase in line.strip().split("  "):
+            phrase = phrase.strip()
+            if phrase:
+                self.length += len(phrase) + (1 if self.chunks else 0)
+                self.chunks.append(phrase)
+                if self.length >= self.max_chars and not self.collect_links:
+                    self.done = True
+                    return
+
+    def close(self):
+        if self.partial and not self.done:
+            self._add_line(self.partial)
+        self.partial = ""
+        return self.result()
+
+    def result(self) -> dict:
+        return {
+            'text': '\n'.join(self.chunks)[:self.max_chars],
+            'canonical': self.canonical,
+            'links': [(href, " ".join("".join(parts).split())) for href, parts in self.links],
+        }
+
+
+class _StdlibTokenizer(HTMLParser):
+    """Adapts html.parser callbacks to the collector target interface."""
+
+    def __init__(self, target: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags never contain text
+        self.target.start(tag, attrs)
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def _feed_until_done(parser, target: _TextCollector, html: str):
+    for i in range(0, len(html), FEED_SIZE):
+        parser.feed(html[i:i + FEED_SIZE])
+        if target.done:
+            break
+
+
+@register_engine("stream")
+def _extract_stream(html: str, max_chars: int, collect_links: bool) -> dict:
+    target = _TextCollector(max_chars, collect_links)
+    parser = _StdlibTokenizer(target)
+    _feed_until_done(parser, target, html)
+    if not target.done:
+        parser.close()
+    return target.close()
+
+
+class _LxmlTarget(_TextCollector):
+    """lxml passes attributes as a dict and calls comment() separately."""
+
+    def comment(self, text):
+        pass
+
+
+@register_engine("lxml")
+def _extract_lxml(html: str, max_chars: int, collect_links: bool) -> dict:
+    etree = _lxml_etree()
+    if etree is None:
+        return _extract_stream(html, max_chars, collect_links)
+    target = _LxmlTarget(max_chars, collect_links)
+    parser = etree.HTMLParser(target=target)
+    _feed_until_done(parser, target, html)
+    if target.done:
+        return target.result()
+    return parser.close()
+
+
+@register_engine("bs4")
+def _extract_bs4(html: str, max_chars: int, collect_links: bool) -> dict:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    canonical = ""
+    tag = soup.find('link', rel='canonical')
+    if tag and tag.get('href'):
+        canonical = tag['href']
+    links = []
+    if collect_links:
+        # Collect before soup_to_text strips nav/footer, which is where these links usually live
+        links = [(a['href'], a.get_text(" ", strip=True)) for a in soup.find_all('a', href=True)]
+    return {'text': soup_to_text(soup, max_chars), 'canonical': canonical, 'links': links}
+
+
+def _resolve_engine(engine: str = None) -> str:
+    engine = engine or DEFAULT_ENGINE
+    if engine == "auto":
+        return "lxml" if _lxml_etree() is not None else "stream"
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown extraction engine '{engine}'. Available: {', '.join(sorted(ENGINES))}")
+    return engine
+
+
+def extract_page(html: str, max_chars: int = MAX_PAGE_CHARS, collect_links: bool = False, engine: str = None) -> dict:
+    """
+    Extracts {'text', 'canonical', 'links'} from an HTML document.
+    `links` is a list of (href, anchor_text) and is only populated when
+    collect_links=True (which also disables the early cutoff).
+    """
+    return ENGINES[_resolve_engine(engine)](html or "", max_chars, collect_links)
+
+
+def extract_text(html: str, max_chars: int = MAX_PAGE_CHARS, engine: str = None) -> str:
+    """Returns the normalized visible text of an HTML document."""
+    return extract_page(html, max_chars, engine=engine)['text']
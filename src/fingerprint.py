@@ -0,0 +1,103 @@
+"""
+Content fingerprints for deciding whether research changed between runs.
+
+Website text is normalized (case, whitespace, and dates, times and obvious
+counters such as copyright years, "updated 5 minutes ago" or "1,234 views"
+replaced by placeholders; other figures like revenue or headcount are kept)
+and reduced to a bottom-k sketch of its word 3-gram hashes, which estimates
+Jaccard similarity to within about ±0.015 at k=256. News is fingerprinted as
+the set of per-article fingerprints from dedup.news_fingerprints; any added
+or removed article is a change.
+"""
+import hashlib
+import json
+import re
+
+from .dedup import news_fingerprints
+
+SKETCH_SIZE = 256
+SHINGLE_WORDS = 3
+
+_MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_COUNTER_WORDS = r"(?:views?|visitors?|visits|likes?|comments?|shares?|followers?|subscribers?|downloads?|reads?|stars?|reviews?|ratings?)"
+_NOISE_PATTERNS = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[t ]\d{2}:\d{2}(?::\d{2})?(?:\.\d+)?(?:z|[+-]\d{2}:?\d{2})?)?\b"), " <date> "),
+    (re.compile(r"\b\d{1,2}[/.]\d{1,2}[/.]\d{2,4}\b"), " <date> "),
+    (re.compile(rf"\b{_MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}\b"), " <date> "),
+    (re.compile(rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS}\s+\d{{4}}\b"), " <date> "),
+    (re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\s*(?:am|pm)?\b"), " <time> "),
+    (re.compile(r"(?:©|&copy;|\(c\)|copyright)\s*(?:\d{4}\s*[-–]\s*)?\d{4}"), " <copyright> "),
+    (re.compile(r"\b\d+\s+(?:second|minute|hour|day|week|month|year)s?\s+ago\b"), " <ago> "),
+    (re.compile(rf"\b\d[\d,.]*[km]?\s+{_COUNTER_WORDS}\b"), " <count> "),
+    (re.compile(rf"\b{_COUNTER_WORDS}\s*:?\s*\d[\d,.]*[km]?\b"), " <count> "),
+]
+_WORD_RE = re.compile(r"<\w+>|\w+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases and masks dates, times and page counters so they don't register as changes."""
+    text = (text or "").lower()
+    for pattern, placeholder in _NOISE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return " ".join(text.split())
+
+
+def text_sketch(text: str, k: int = SKETCH_SIZE) -> list:
+    """Bottom-k sketch: the k smallest 64-bit hashes of the normalized text's word shingles."""
+    words = _WORD_RE.findall(normalize_text(text))
+    if len(words) < SHINGLE_WORDS:
+        shingles = {" ".join(words)} if words else set()
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = {
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+        for s in shingles
+    }
+    return sorted(hashes)[:k]
+
+
+def sketch_similarity(a: list, b: list, k: int = SKETCH_SIZE) -> float:
+    """Estimated Jaccard similarity of two texts from their bottom-k sketches."""
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    set_a, set_b = set(a), set(b)
+    union_sketch = sorted(set_a | set_b)[:k]
+    shared = sum(1 for h in union_sketch if h in set_a and h in set_b)
+    return shared / len(union_sketch)
+
+
+def set_similarity(a: list, b: list) -> float:
+    set_a, set_b = set(a), set(b)
+    if not set_a and not set_b:
+        return 1.0
+    return len(set_a & set_b) / len(set_a | set_b)
+
+
+def inputs_hash(mode: str, value_proposition: str = None, job_description: str = None, cv_text: str = None) -> str:
+    payload = json.dumps([mode, value_proposition or "", job_description or "", cv_text or ""], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def research_fingerprint(website_content: str, news_results: list) -> dict:
+    news = set()
+    for item in news_results or []:
+        # One fingerprint per article is enough to tell sets apart; prefer the URL form
+        fingerprints = news_fingerprints(item)
+        if fingerprints:
+            news.add(fingerprints[0])
+    return {
+        'website_exact': hashlib.sha256(normalize_text(website_content).encode('utf-8')).hexdigest(),
+        'website_sketch': text_sketch(website_content),
+        'news': sorted(news),
+    }
+
+
+def compare_fingerprints(previous: dict, current: dict) -> dict:
+    """Returns {'website': float, 'news': float} similarities in [0, 1]; news is 1.0 only for the same article set."""
+    if previous['website_exact'] == current['website_exact']:
+        website = 1.0
+    else:
+        website = sketch_similarity(previous['website_sketch'], current['website_sketch'])
+    return {'website': website, 'news': set_similarity(previous['news'], current['news'])}
@@ -0,0 +1,221 @@
+import inspect
+import random
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Fallback user agents in case fake_useragent can't load its data set.
+FALLBACK_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+]
+
+USER_AGENT_POOL_SIZE = 25
+POOL_CONNECTIONS = 32      # Number of hosts with a kept-alive pool
+POOL_MAXSIZE = 8           # Kept-alive connections per host
+PER_HOST_LIMIT = 6         # Concurrent in-flight requests per host
+MAX_RETRIES = 2
+BACKOFF_FACTOR = 0.4
+BACKOFF_JITTER = 0.3
+# 429s are not retried here: src/ratelimit.py retries them and adapts the backend's rate.
+RETRY_STATUSES = (500, 502, 503, 504)
+# Longest Retry-After (on a 503) a request thread will sleep for; urllib3's default is 6 hours.
+RETRY_AFTER_MAX = 10
+MAX_RESPONSE_BYTES = 2 * 1024 * 1024
+DEFAULT_TIMEOUT = 10
+
+
+def _accept_encoding() -> str:
+    """Advertises brotli only when urllib3 can actually decode it."""
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+        encodings.append("br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append("br")
+        except ImportError:
+            pass
+    return ", ".join(encodings)
+
+
+def _load_user_agents(size: int) -> list:
+    """Loads the fake_useragent data set once and samples a fixed pool from it."""
+    try:
+        from fake_useragent import UserAgent
+        ua = UserAgent()
+        pool = list({ua.random for _ in range(size * 2)})[:size]
+        if pool:
+            return pool
+    except Exception as e:
+        print(f"Could not load user agent data set, using fallback list: {e}")
+    return list(FALLBACK_USER_AGENTS)
+
+
+class HostLimiter:
+    """Caps concurrent requests per host."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def get(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.Semaphore(self.limit)
+            return self._semaphores[host]
+
+
+class HttpResponse:
+    """A fully-read, size-capped response."""
+
+    def __init__(self, url: str, status_code: int, headers, content: bytes, encoding: str, truncated: bool):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.truncated = truncated
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}")
+
+
+class HttpClient:
+    """
+    Process-wide HTTP client: keep-alive pooling per host, gzip/brotli
+    negotiation, retries with jittered backoff, response size caps and a
+    user-agent pool loaded once.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = POOL_CONNECTIONS,
+        pool_maxsize: int = POOL_MAXSIZE,
+        per_host_limit: int = PER_HOST_LIMIT,
+        max_retries: int = MAX_RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        backoff_jitter: float = BACKOFF_JITTER,
+        max_response_bytes: int = MAX_RESPONSE_BYTES
+    ):
+        self.max_response_bytes = max_response_bytes
+        self.user_agents = _load_user_agents(USER_AGENT_POOL_SIZE)
+        self.limiter = HostLimiter(per_host_limit)
+
+        retry_kwargs = dict(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # Older urllib3 releases lack built-in jitter and the Retry-After cap
+        supported = inspect.signature(Retry.__init__).parameters
+        optional = {'backoff_jitter': backoff_jitter, 'retry_after_max': RETRY_AFTER_MAX}
+        retry = Retry(**retry_kwargs, **{k: v for k, v in optional.items() if k in supported})
+
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.session.headers.update({
+            'Accept-Encoding': _accept_encoding(),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+        })
+
+        self._stats_lock = threading.Lock()
+        self._requests_by_host = {}
+
+    def random_user_agent(self) -> str:
+        return random.choice(self.user_agents)
+
+    def get(self, url: str, headers: dict = None, timeout: float = DEFAULT_TIMEOUT, max_bytes: int = None) -> HttpResponse:
+        """
+        Performs a GET and reads at most `max_bytes` of the (decompressed) body.
+        Raises requests exceptions on connection failures, like requests.get.
+        """
+        cap = max_bytes or self.max_response_bytes
+        request_headers = {'User-Agent': self.random_user_agent()}
+        if headers:
+            request_headers.update(headers)
+
+        host = urlparse(url).netloc.lower()
+        with self._stats_lock:
+            self._requests_by_host[host] = self._requests_by_host.get(host, 0) + 1
+
+        with self.limiter.get(url):
+            with self.session.get(url, headers=request_headers, timeout=timeout, stream=True) as response:
+                body = bytearray()
+                truncated = False
+                for block in response.iter_content(chunk_size=16384):
+                    body.extend(block)
+                    if len(body) >= cap:
+                        truncated = len(body) > cap
+                        del body[cap:]
+                        break
+                return HttpResponse(
+                    url=response.url,
+                    status_code=response.status_code,
+                    headers=response.headers,
+                    content=bytes(body),
+                    encoding=response.encoding,
+                    truncated=truncated,
+                )
+
+    def connection_stats(self) -> dict:
+        """
+        Returns per-host request counts and how many new connections urllib3
+        opened, so connection reuse can be confirmed.
+        """
+        stats = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            entry = stats.setdefault(host, {'requests': 0, 'new_connections': 0})
+            entry['requests'] += pool.num_requests
+            entry['new_connections'] += pool.num_connections
+        for entry in stats.values():
+            entry['reused'] = max(entry['requests'] - entry['new_connections'], 0)
+        with self._stats_lock:
+            for host, count in self._requests_by_host.items():
+                stats.setdefault(host, {'requests': 0, 'new_connections': 0, 'reused': 0})['calls'] = count
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Returns the shared HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+
+def connection_stats() -> dict:
+    return get_client().connection_stats()
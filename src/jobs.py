@@ -0,0 +1,350 @@
+"""
+Persistent background job queue for research + brief generation.
+
+Jobs live in a SQLite database next to the research cache, so the
+Streamlit app can submit work, return immediately and poll for the result
+while separate worker processes (see worker.py) do the research and the
+LLM call. A job whose worker stops heartbeating is put back in the queue.
+"""
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from .cache import CACHE_DIR
+
+JOBS_DB = os.getenv("B2B_JOBS_DB", os.path.join(CACHE_DIR, "jobs.sqlite3"))
+
+HEARTBEAT_INTERVAL = 5
+# A running job whose worker has been silent this long is requeued (or failed after MAX_ATTEMPTS).
+STALE_AFTER = 60
+MAX_ATTEMPTS = 3
+
+# Finished and failed jobs are deleted after this long; workers purge every PURGE_INTERVAL.
+JOB_RETENTION = int(os.getenv("B2B_JOB_RETENTION", 7 * 24 * 3600))
+PURGE_INTERVAL = 3600
+
+# Params only kept while a job can still run, removed from the row as soon as it
+# is done or failed: CV text is personal data (see pdf_utils), and research the
+# app hands over for reuse is large and already in the research cache.
+TRANSIENT_PARAMS = ('cv_text', 'research')
+_SCRUB_PARAMS = "params = json_remove(params, " + ", ".join(f"'$.{name}'" for name in TRANSIENT_PARAMS) + ")"
+
+# The app starts this many local workers if none are alive (0 to rely on externally managed workers).
+AUTOSTART_WORKERS = int(os.getenv("B2B_AUTOSTART_WORKERS", 2))
+# Auto-started workers exit after this long without work.
+AUTOSTART_IDLE_EXIT = 900
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "worker.py")
+
+
+class JobQueue:
+    """
+    SQLite-backed FIFO queue. Safe to share between threads and processes:
+    each thread gets its own connection and jobs are claimed inside an
+    immediate transaction, so two workers never pick up the same job.
+    """
+
+    def __init__(self, path: str = JOBS_DB):
+        self.path = path
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            # Overwrite deleted content (scrubbed CV text) instead of leaving it in free pages
+            conn.execute("PRAGMA secure_delete=ON")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                progress TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                heartbeat REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workers (
+                id TEXT PRIMARY KEY,
+                heartbeat REAL NOT NULL
+            )
+        """)
+
+    def submit(self, params: dict) -> str:
+        """Queues a job and returns its id."""
+        job_id = uuid.uuid4().hex[:12]
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, params, created) VALUES (?, 'queued', ?, ?)",
+            (job_id, json.dumps(params), time.time())
+        )
+        return job_id
+
+    def claim(self, worker_id: str):
+        """Marks the oldest queued job as running for this worker and returns it, or None."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Recover jobs whose worker died mid-run
+            conn.execute(
+                f"UPDATE jobs SET status = 'failed', finished = ?, error = 'Worker stopped responding', {_SCRUB_PARAMS} "
+                "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                (now, now - STALE_AFTER, MAX_ATTEMPTS)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL "
+                "WHERE status = 'running' AND heartbeat < ?",
+                (now - STALE_AFTER,)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started = ?, heartbeat = ?, "
+                "attempts = attempts + 1, progress = NULL WHERE id = ?",
+                (worker_id, now, now, row['id'])
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row['id'])
+
+    # Updates from a worker only apply while it still owns the job: one that went
+    # silent may have had its job requeued and claimed by another worker since.
+    _OWNED = "WHERE id = ? AND worker = ? AND status = 'running'"
+
+    def heartbeat(self, job_id: str, worker_id: str, progress: str = None):
+        if progress is None:
+            self._connect().execute(f"UPDATE jobs SET heartbeat = ? {self._OWNED}", (time.time(), job_id, worker_id))
+        else:
+            self._connect().execute(
+                f"UPDATE jobs SET heartbeat = ?, progress = ? {self._OWNED}", (time.time(), progress, job_id, worker_id)
+            )
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        """Stores the result. Returns False (and changes nothing) if the worker no longer owns the job."""
+        cursor = self._connect().execute(
+            f"UPDATE jobs SET status = 'done', result = ?, finished = ?, {_SCRUB_PARAMS} {self._OWNED}",
+            (json.dumps(result), time.time(), job_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Marks the job failed. Returns False (and changes nothing) if the worker no longer owns the job."""
+        cursor = self._connect().execute(
+            f"UPDATE jobs SET status = 'failed', error = ?, finished = ?, {_SCRUB_PARAMS} {self._OWNED}",
+            (error, time.time(), job_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def purge_finished(self, retention: float = JOB_RETENTION) -> int:
+        """Deletes done and failed jobs that finished more than `retention` seconds ago. Returns the count."""
+        cursor = self._connect().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+            (time.time() - retention,)
+        )
+        return cursor.rowcount
+
+    def get(self, job_id: str):
+        """Returns a job as a dict (params/result decoded), or None."""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def position(self, job_id: str) -> int:
+        """Number of queued jobs ahead of this one."""
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created < "
+            "(SELECT created FROM jobs WHERE id = ?)", (job_id,)
+        ).fetchone()
+        return row[0]
+
+    def worker_alive(self, worker_id: str):
+        self._connect().execute(
+            "INSERT INTO workers (id, heartbeat) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET heartbeat = excluded.heartbeat",
+            (worker_id, time.time())
+        )
+
+    def worker_stopped(self, worker_id: str):
+        self._connect().execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def live_workers(self) -> int:
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM workers WHERE heartbeat > ?", (time.time() - STALE_AFTER,)
+        ).fetchone()
+        return row[0]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    """Returns the process-wide job queue, creating it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+def run_job(params: dict, on_progress=None) -> dict:
+    """
+    Runs research and brief generation for one job's parameters. A `research`
+    bundle in the params (the app's session research) is used instead of
+    researching again; `regenerate` (default: `refresh`) skips the response cache.
+    """
+    # Imported here so the app can submit and poll without loading the pipeline
+    from .pipeline import run_research
+    from .analyzer import generate_brief
+    from .monitor import state_key, record_brief
+
+    start = time.monotonic()
+    research = params.get('research')
+    if research is None:
+        research = run_research(
+            params['url'],
+            company_name=params.get('company_name'),
+            on_progress=on_progress,
+            refresh=params.get('refresh', False),
+            crawl=params.get('crawl', False),
+        )
+    elif on_progress:
+        on_progress("Reusing research already fetched in this session.")
+    if on_progress:
+        on_progress("Generating AI strategy...")
+    report = generate_brief(
+        company_name=research['company_name'],
+        website_content=research['website_content'],
+        news_results=research['news_results'],
+        mode=params.get('mode', "Target Account Research"),
+        value_proposition=params.get('value_proposition'),
+        job_description=params.get('job_description'),
+        cv_text=params.get('cv_text'),
+        on_progress=on_progress,
+        regenerate=params.get('regenerate', params.get('refresh', False)),
+        map_reduce=params.get('map_reduce', False),
+    )
+    if report.startswith("Error"):
+        raise RuntimeError(report)
+    record_brief(
+        state_key(params['url'], params.get('mode', "Target Account Research"), params.get('value_proposition'),
+                  params.get('job_description'), params.get('cv_text')),
+        research['company_name'], research['news_results'], report,
+        site_url=params['url'], crawl=params.get('crawl', False),
+    )
+    return {
+        'company_name': research['company_name'],
+        'report': report,
+        'research_elapsed': research['elapsed'],
+        'elapsed': time.monotonic() - start,
+    }
+
+
+def worker_loop(queue: JobQueue = None, poll_interval: float = 1.0, idle_exit: float = None, stop_event=None):
+    """Claims and runs jobs until stopped (or idle for `idle_exit` seconds)."""
+    queue = queue or get_queue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    last_work = time.monotonic()
+    last_purge = 0.0
+    print(f"Worker {worker_id} started")
+    try:
+        while not (stop_event and stop_event.is_set()):
+            queue.worker_alive(worker_id)
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                purged = queue.purge_finished()
+                if purged:
+                    print(f"Worker {worker_id} purged {purged} finished job(s)")
+                last_purge = time.monotonic()
+            job = queue.claim(worker_id)
+            if job is None:
+                if idle_exit and time.monotonic() - last_work > idle_exit:
+                    print(f"Worker {worker_id} idle for {idle_exit:.0f}s; exiting")
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            print(f"Worker {worker_id} running job {job['id']} ({job['params'].get('url')})")
+            done = threading.Event()
+
+            def beat():
+                while not done.wait(HEARTBEAT_INTERVAL):
+                    queue.heartbeat(job['id'], worker_id)
+                    queue.worker_alive(worker_id)
+
+            beater = threading.Thread(target=beat, daemon=True)
+            beater.start()
+            try:
+                result = run_job(job['params'], on_progress=lambda msg: queue.heartbeat(job['id'], worker_id, msg))
+                owned = queue.complete(job['id'], worker_id, result)
+            except Exception as e:
+                print(f"Job {job['id']} failed: {e}")
+                owned = queue.fail(job['id'], worker_id, str(e))
+            finally:
+                done.set()
+                beater.join()
+            if not owned:
+                print(f"Job {job['id']} was requeued while {worker_id} ran it; discarding this outcome")
+            last_work = time.monotonic()
+    finally:
+        queue.worker_stopped(worker_id)
+
+
+_spawn_lock = threading.Lock()
+
+
+def ensure_workers(count: int = AUTOSTART_WORKERS) -> bool:
+    """
+    Starts local worker processes if no worker is alive (never when count is 0).
+    Returns True if a worker is alive to take jobs.
+    """
+    if count <= 0:
+        return get_queue().live_workers() > 0
+    with _spawn_lock:
+        if get_queue().live_workers() > 0:
+            return True
+        subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, "--workers", str(count), "--idle-exit", str(AUTOSTART_IDLE_EXIT)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        # Give the workers a moment to register so the next call doesn't spawn another set
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and get_queue().live_workers() == 0:
+            time.sleep(0.2)
+        return get_queue().live_workers() > 0
@@ -0,0 +1,301 @@
+"""
+In-process timing and token instrumentation.
+
+Spans record duration, bytes fetched, prompt/completion tokens and an
+outcome. Finished spans go to a rolling registry that can be rendered in
+Prometheus text format (optionally served over HTTP) and, if configured,
+appended to a JSON-lines log. Spans are tagged with the current run id so
+a per-run breakdown can be shown in the UI.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RECENT_SPANS = 5000
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+# Set B2B_METRICS_LOG to a file path to append every span as a JSON line.
+METRICS_LOG = os.getenv("B2B_METRICS_LOG")
+# Set B2B_METRICS_PORT to serve /metrics in Prometheus text format. Spans carry
+# company names, so it listens on loopback unless B2B_METRICS_HOST says otherwise.
+METRICS_PORT = os.getenv("B2B_METRICS_PORT")
+METRICS_HOST = os.getenv("B2B_METRICS_HOST", "127.0.0.1")
+
+# Stats functions rendered as gauges alongside the spans; see register_collector.
+_collectors = {}
+
+_current_run = contextvars.ContextVar("b2b_run_id", default=None)
+_current_span = contextvars.ContextVar("b2b_span", default=None)
+
+
+class Span:
+    """A timed unit of work. Attributes can be added while the span is open."""
+
+    def __init__(self, name: str, run_id: str = None, **attrs):
+        self.name = name
+        self.run_id = run_id
+        self.start = time.time()
+        self.duration = 0.0
+        self.bytes = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.outcome = "ok"
+        self.attrs = attrs
+
+    def add_bytes(self, n: int):
+        self.bytes += n or 0
+
+    def set_tokens(self, prompt: int = None, completion: int = None):
+        if prompt is not None:
+            self.prompt_tokens = prompt
+        if completion is not None:
+            self.completion_tokens = completion
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'run_id': self.run_id,
+            'start': self.start,
+            'duration': self.duration,
+            'bytes': self.bytes,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'outcome': self.outcome,
+            **self.attrs,
+        }
+
+
+class _NullSpan(Span):
+    """Returned by current_span() outside any span, so callers never need to check."""
+
+    def __init__(self):
+        super().__init__("none")
+
+
+class MetricsRegistry:
+    """Rolling store of recent spans plus cumulative aggregates for export."""
+
+    def __init__(self, max_recent: int = RECENT_SPANS, log_path: str = METRICS_LOG):
+        self.recent = deque(maxlen=max_recent)
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        # (name, outcome) -> aggregate
+        self._aggregates = {}
+
+    def record(self, span: Span):
+        with self._lock:
+            self.recent.append(span)
+            agg = self._aggregates.setdefault((span.name, span.outcome), {
+                'count': 0, 'duration': 0.0, 'bytes': 0,
+                'prompt_tokens': 0, 'completion_tokens': 0,
+                'buckets': [0] * len(DURATION_BUCKETS),
+            })
+            agg['count'] += 1
+            agg['duration'] += span.duration
+            agg['bytes'] += span.bytes
+            agg['prompt_tokens'] += span.prompt_tokens
+            agg['completion_tokens'] += span.completion_tokens
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    agg['buckets'][i] += 1
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span.to_dict(), default=str) + "\n")
+            except OSError as e:
+                print(f"Could not write metrics log: {e}")
+
+    def spans_for_run(self, run_id: str) -> list:
+        with self._lock:
+            return [s for s in self.recent if s.run_id == run_id]
+
+    def render_prometheus(self) -> str:
+        """Renders cumulative aggregates in Prometheus text exposition format."""
+        with self._lock:
+            aggregates = {k: dict(v, buckets=list(v['buckets'])) for k, v in self._aggregates.items()}
+
+        lines = [
+            "# HELP b2b_span_duration_seconds Duration of pipeline stages.",
+            "# TYPE b2b_span_duration_seconds histogram",
+        ]
+        for (name, outcome), agg in sorted(aggregates.items()):
+            labels = f'span="{name}",outcome="{outcome}"'
+            for bound, count in zip(DURATION_BUCKETS, agg['buckets']):
+                lines.append(f'b2b_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'b2b_span_duration_seconds_bucket{{{labels},le="+Inf"}} {agg["count"]}')
+            lines.append(f'b2b_span_duration_seconds_sum{{{labels}}} {agg["duration"]:.6f}')
+            lines.append(f'b2b_span_duration_seconds_count{{{labels}}} {agg["count"]}')
+
+        lines += ["# HELP b2b_span_bytes_total Bytes fetched by pipeline stages.",
+                  "# TYPE b2b_span_bytes_total counter"]
+        for (name, outcome), agg in sorted(aggregates.items()):
+            lines.append(f'b2b_span_bytes_total{{span="{name}",outcome="{outcome}"}} {agg["bytes"]}')
+
+        lines += ["# HELP b2b_llm_tokens_total LLM tokens by stage and kind.",
+                  "# TYPE b2b_llm_tokens_total counter"]
+        for (name, outcome), agg in sorted(aggregates.items()):
+            if agg['prompt_tokens'] or agg['completion_tokens']:
+                lines.append(f'b2b_llm_tokens_total{{span="{name}",outcome="{outcome}",kind="prompt"}} {agg["prompt_tokens"]}')
+                lines.append(f'b2b_llm_tokens_total{{span="{name}",outcome="{outcome}",kind="completion"}} {agg["completion_tokens"]}')
+
+        lines += _render_collectors()
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def register_collector(name: str, fn, label: str = None):
+    """
+    Exposes fn()'s numbers on /metrics as b2b_<name>_<field> gauges. fn returns
+    {field: number}, or with `label` set {label value: {field: number}}
+    (e.g. per host). Registering a name again replaces the earlier collector.
+    """
+    _collectors[name] = (fn, label)
+
+
+def _render_collectors() -> list:
+    lines = []
+    for name, (fn, label) in sorted(_collectors.items()):
+        try:
+            stats = fn()
+        except Exception as e:
+            print(f"Metrics collector {name} failed: {e}")
+            continue
+        rows = stats.items() if label else [(None, stats)]
+        series = {}
+        for key, values in rows:
+            for field, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                labels = f'{{{label}="{key}"}}' if label else ""
+                series.setdefault(f"b2b_{name}_{field}", []).append(f"{labels} {value}")
+        for metric, samples in sorted(series.items()):
+            lines.append(f"# TYPE {metric} gauge")
+            lines += [metric + sample for sample in samples]
+    return lines
+
+
+def start_run() -> str:
+    """Starts a new run in the current context and returns its id."""
+    run_id = uuid.uuid4().hex[:12]
+    _current_run.set(run_id)
+    return run_id
+
+
+def current_run() -> str:
+    return _current_run.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Times a block. Exceptions mark the outcome 'error' and propagate;
+    code inside may also set `s.outcome` (e.g. 'cache_hit', 'empty').
+    """
+    s = Span(name, run_id=_current_run.get(), **attrs)
+    token = _current_span.set(s)
+    started = time.perf_counter()
+    try:
+        yield s
+    except BaseException:
+        s.outcome = "error"
+        raise
+    finally:
+        s.duration = time.perf_counter() - started
+        _current_span.reset(token)
+        registry.record(s)
+
+
+def record(name: str, duration: float, outcome: str = "ok", **attrs):
+    """Records an already-measured span (e.g. time accumulated across a stream)."""
+    s = Span(name, run_id=_current_run.get(), **attrs)
+    s.duration = duration
+    s.outcome = outcome
+    registry.record(s)
+
+
+def current_span() -> Span:
+    """The innermost open span in this context, or a throwaway span if none."""
+    return _current_span.get() or _NullSpan()
+
+
+def run_breakdown(run_id: str) -> list:
+    """Per-stage rows for a run: [{'stage', 'count', 'duration', 'bytes', 'tokens', 'outcomes'}]."""
+    rows = {}
+    for s in run_spans(run_id):
+        row = rows.setdefault(s.name, {'stage': s.name, 'count': 0, 'duration': 0.0, 'bytes': 0, 'tokens': 0, 'outcomes': {}})
+        row['count'] += 1
+        # Concurrent spans of the same stage overlap, so report the slowest rather than the sum
+        row['duration'] = max(row['duration'], s.duration)
+        row['bytes'] += s.bytes
+        row['tokens'] += s.prompt_tokens + s.completion_tokens
+        row['outcomes'][s.outcome] = row['outcomes'].get(s.outcome, 0) + 1
+    return sorted(rows.values(), key=lambda r: -r['duration'])
+
+
+def run_spans(run_id: str) -> list:
+    return registry.spans_for_run(run_id)
+
+
+def format_breakdown(run_id: str) -> str:
+    """Markdown table of a run's stages for the status panel."""
+    rows = run_breakdown(run_id)
+    if not rows:
+        return ""
+    lines = ["| Stage | Calls | Time (s) | KiB | Tokens | Outcome |", "|---|---|---|---|---|---|"]
+    for r in rows:
+        outcomes = ", ".join(f"{k} x{v}" if v > 1 else k for k, v in r['outcomes'].items())
+        lines.append(f"| {r['stage']} | {r['count']} | {r['duration']:.2f} | {r['bytes'] / 1024:.0f} | {r['tokens']:,} | {outcomes} |")
+    return "\n".join(lines)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the app log
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = None, host: str = None):
+    """
+    Serves /metrics on `host`:`port` (default B2B_METRICS_HOST:B2B_METRICS_PORT)
+    in a daemon thread. Safe to call repeatedly.
+    """
+    global _server
+    port = port or (int(METRICS_PORT) if METRICS_PORT else None)
+    if not port:
+        return None
+    host = host or METRICS_HOST
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                # Another process (e.g. a second Streamlit worker) already owns the port
+                print(f"Metrics server not started on port {port}: {e}")
+                _server = False
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            print(f"Serving Prometheus metrics on {host}:{port}/metrics")
+    return _server or None
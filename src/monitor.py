@@ -0,0 +1,175 @@
+"""
+Incremental refresh for accounts that are tracked over time.
+
+After a full brief, the company's state is stored: the report, fingerprints
+of every article it was based on, the newest RSS publication date and the
+feed URLs the site advertised. A later refresh fetches news only (the site
+itself is not scraped again), keeps the articles not seen before and asks
+the model for a short "what changed" update on top of the stored report
+instead of rewriting it. Unchanged news costs no LLM call at all.
+
+State is keyed by company and by the inputs that shaped the report (mode,
+value proposition / JD / CV), so a brief written for different inputs is
+never extended.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+
+from .cache import get_cache, normalize_domain_key
+from .dedup import news_fingerprints
+from .researcher import search_news_with_status, site_feeds
+from .analyzer import generate_delta_brief
+
+# Updates kept (and shown to the model so it doesn't repeat itself).
+MAX_UPDATES = 5
+# After this long, or this many updates, the next run writes a full brief again.
+MAX_BASE_AGE = 30 * 24 * 3600
+MAX_UPDATES_BEFORE_REBASE = 8
+# Cap on articles fed to one update; the newest first.
+MAX_NEW_ITEMS = 15
+
+
+def state_key(url: str, mode: str, value_proposition: str = None, job_description: str = None, cv_text: str = None) -> str:
+    inputs = json.dumps([mode, value_proposition or "", job_description or "", cv_text or ""], ensure_ascii=False)
+    return normalize_domain_key(url) + "|" + hashlib.sha1(inputs.encode('utf-8')).hexdigest()[:12]
+
+
+def load_state(key: str):
+    return get_cache("monitor").get('monitor', key)
+
+
+def _save_state(key: str, state: dict):
+    get_cache("monitor").set('monitor', key, state)
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%d %b %Y %H:%M UTC")
+
+
+def _latest_published(items: list, current: str = "") -> str:
+    dates = [item.get('published') for item in items if item.get('published')]
+    return max(dates + ([current] if current else []), default="")
+
+
+def record_brief(key: str, company_name: str, news_results: list, report: str,
+                 site_url: str = None, crawl: bool = False):
+    """
+    Stores a freshly generated full brief as the base for later incremental
+    refreshes. `site_url` and `crawl` must match the research the brief was
+    written from, so refreshes re-check the same sources (e.g. the site's feeds).
+    """
+    if not report or report.startswith("Error"):
+        return
+    seen = set()
+    for item in news_results or []:
+        seen.update(news_fingerprints(item))
+    _save_state(key, {
+        'company_name': company_name,
+        'site_url': site_url,
+        'crawl': crawl,
+        # Discovered while the brief's research scraped the site; refreshes read them directly
+        'feeds': site_feeds(site_url, crawl) if site_url else [],
+        'report': report,
+        'created': time.time(),
+        'updated': time.time(),
+        'seen': sorted(seen),
+        'latest_published': _latest_published(news_results or []),
+        'updates': [],
+        'total_updates': 0,
+    })
+
+
+def needs_full_brief(state: dict) -> bool:
+    """True if there is no usable base report (missing, too old, extended too often or without its site's feeds)."""
+    return (
+        not state
+        or 'feeds' not in state
+        or time.time() - state['created'] > MAX_BASE_AGE
+        or state.get('total_updates', 0) >= MAX_UPDATES_BEFORE_REBASE
+    )
+
+
+def find_new_items(state: dict, news_results: list) -> list:
+    """Articles not seen in any earlier run and not older than the newest RSS date already covered."""
+    seen = set(state.get('seen', []))
+    latest = state.get('latest_published', "")
+    new_items = []
+    for item in news_results:
+        if seen.intersection(news_fingerprints(item)):
+            continue
+        published = item.get('published')
+        if published and latest and published <= latest:
+            continue
+        new_items.append(item)
+    # Newest dated items first, undated (DDG) results after
+    new_items.sort(key=lambda item: item.get('published') or "", reverse=True)
+    return new_items[:MAX_NEW_ITEMS]
+
+
+def compose_report(state: dict) -> str:
+    """The stored base report with the most recent update on top."""
+    if not state.get('updates'):
+        return state['report']
+    latest = state['updates'][-1]
+    return (f"## What Changed Since {latest['since']}\n\n{latest['text']}\n\n---\n\n"
+            f"{state['report']}")
+
+
+def refresh_brief(key: str, company_name: str, mode: str, value_proposition: str = None,
+                  job_description: str = None, on_progress=None) -> dict:
+    """
+    Incrementally refreshes a tracked company. Returns None when a full brief
+    is needed instead (see needs_full_brief), else:
+        {
+            'report': str,        # base report with the latest update on top
+            'new_items': int,
+            'update': str or None,  # None when nothing new was found
+            'since': str,         # when the previous run happened
+            'elapsed': float,
+        }
+    """
+    start = time.monotonic()
+    state = load_state(key)
+    if needs_full_brief(state):
+        return None
+
+    since = _format_time(state['updated'])
+    if on_progress:
+        on_progress(f"Checking for news since {since}...")
+    # The same sources as the base brief's research, including the site's own feeds
+    news_results, _ = search_news_with_status(company_name, refresh=True, feeds=state['feeds'])
+    new_items = find_new_items(state, news_results)
+
+    if not new_items:
+        if on_progress:
+            on_progress("No new articles; reusing the previous report.")
+        state['updated'] = time.time()
+        _save_state(key, state)
+        return {'report': compose_report(state), 'new_items': 0, 'update': None,
+                'since': since, 'elapsed': time.monotonic() - start}
+
+    if on_progress:
+        on_progress(f"{len(new_items)} new articles; writing an update...")
+    update = generate_delta_brief(
+        company_name, state['report'], _format_time(state['created']), new_items,
+        previous_updates=[u['text'] for u in state['updates']],
+        mode=mode, value_proposition=value_proposition, job_description=job_description,
+        on_progress=on_progress,
+    )
+    if update.startswith("Error"):
+        raise RuntimeError(update)
+
+    seen = set(state['seen'])
+    for item in new_items:
+        seen.update(news_fingerprints(item))
+    state['seen'] = sorted(seen)
+    state['latest_published'] = _latest_published(new_items, state.get('latest_published', ""))
+    state['updates'] = (state['updates'] + [{'since': since, 'text': update}])[-MAX_UPDATES:]
+    state['total_updates'] = state.get('total_updates', 0) + 1
+    state['updated'] = time.time()
+    _save_state(key, state)
+
+    return {'report': compose_report(state), 'new_items': len(new_items), 'update': update,
+            'since': since, 'elapsed': time.monotonic() - start}
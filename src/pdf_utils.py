@@ -1,15 +1,147 @@
-import PyPDF2
+import hashlib
 import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-def extract_text_from_pdf(pdf_file):
+# Uploads above these limits are rejected / truncated rather than stalling the UI.
+MAX_PDF_BYTES = int(os.getenv("B2B_MAX_PDF_BYTES", 10 * 1024 * 1024))
+MAX_PDF_PAGES = int(os.getenv("B2B_MAX_PDF_PAGES", 30))
+
+# Documents with at least this many pages are split across worker processes.
+PARALLEL_MIN_PAGES = 8
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+
+# Extracted text is kept in memory only (CVs are personal data, so they never
+# go to the shared on-disk cache), keyed by a hash of the file contents.
+PDF_CACHE_ENTRIES = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _open_pdf(data: bytes):
+    # PyPDF2 is imported on first use so the app can start without loading it
+    import PyPDF2
+    return PyPDF2.PdfReader(io.BytesIO(data))
+
+
+def _extract_pages(data: bytes, start: int, stop: int) -> list:
+    """Extracts pages [start, stop) of a PDF. Runs in a worker process for large documents."""
+    reader = _open_pdf(data)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawn rather than fork: forking the multithreaded Streamlit server can
+            # deadlock the child on locks another thread held at fork time
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _extract_parallel(data: bytes, page_count: int) -> list:
+    """Splits the pages into one contiguous range per worker and joins the results in page order."""
+    global _pool
+    step = -(-page_count // PDF_WORKERS)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    try:
+        pool = _get_pool()
+        futures = [pool.submit(_extract_pages, data, start, stop) for start, stop in ranges]
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+        return pages
+    except (BrokenProcessPool, OSError) as e:
+        print(f"Parallel PDF extraction unavailable ({e}); extracting serially.")
+        with _pool_lock:
+            _pool = None
+        return _extract_pages(data, 0, page_count)
+
+
+def _read_bytes(pdf_file) -> bytes:
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if hasattr(pdf_file, "getvalue"):  # Streamlit UploadedFile, BytesIO
+        return pdf_file.getvalue()
+    if isinstance(pdf_file, str):
+        with open(pdf_file, "rb") as f:
+            return f.read()
+    pdf_file.seek(0)
+    return pdf_file.read()
+
+
+def extract_cv(pdf_file) -> dict:
     """
-    Extracts text from a PDF file object.
+    Extracts text from a PDF (file object, path or bytes), reusing the result
+    for identical file contents. At most MAX_PDF_PAGES pages are read; large
+    documents are extracted in parallel.
+
+    Returns:
+        {
+            'text': str,          # "Error extracting PDF: ..." on failure
+            'pages': int,         # pages extracted
+            'total_pages': int,
+            'truncated': bool,    # True if pages were dropped by the page cap
+            'elapsed': float,     # seconds spent extracting (0 on a cache hit)
+            'cached': bool,
+        }
     """
+    started = time.perf_counter()
+    try:
+        data = _read_bytes(pdf_file)
+    except Exception as e:
+        return {'text': f"Error extracting PDF: {str(e)}", 'pages': 0, 'total_pages': 0,
+                'truncated': False, 'elapsed': 0.0, 'cached': False}
+
+    if len(data) > MAX_PDF_BYTES:
+        return {'text': f"Error extracting PDF: file is larger than {MAX_PDF_BYTES // (1024 * 1024)} MB",
+                'pages': 0, 'total_pages': 0, 'truncated': False, 'elapsed': 0.0, 'cached': False}
+
+    key = hashlib.sha256(data).hexdigest()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return dict(hit, elapsed=0.0, cached=True)
+
     try:
-        reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        total_pages = len(_open_pdf(data).pages)
+        page_count = min(total_pages, MAX_PDF_PAGES)
+        if page_count >= PARALLEL_MIN_PAGES and PDF_WORKERS > 1:
+            pages = _extract_parallel(data, page_count)
+        else:
+            pages = _extract_pages(data, 0, page_count)
+        text = "\n".join(pages).strip()
     except Exception as e:
-        return f"Error extracting PDF: {str(e)}"
+        return {'text': f"Error extracting PDF: {str(e)}", 'pages': 0, 'total_pages': 0,
+                'truncated': False, 'elapsed': time.perf_counter() - started, 'cached': False}
+
+    result = {
+        'text': text,
+        'pages': page_count,
+        'total_pages': total_pages,
+        'truncated': total_pages > page_count,
+        'elapsed': time.perf_counter() - started,
+        'cached': False,
+    }
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > PDF_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return result
+
+
+def extract_text_from_pdf(pdf_file):
+    """
+    Extracts text from a PDF file object.
+    """
+    return extract_cv(pdf_file)['text']
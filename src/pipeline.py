@@ -0,0 +1,77 @@
+import time
+
+from .researcher import (
+    scrape_website,
+    _news_tasks,
+    _run_sources,
+    _dedupe_results,
+    _collect_news,
+    _resolve_company_name,
+    summarize_statuses,
+)
+from .utils import extract_company_name
+from . import metrics
+
+# Overall budget for the research fan-out (seconds). Anything still running
+# after this is abandoned and the brief is generated from what has arrived.
+RESEARCH_DEADLINE = 20
+
+
+def run_research(url: str, company_name: str = None, deadline: float = RESEARCH_DEADLINE, on_progress=None, refresh: bool = False, crawl: bool = False) -> dict:
+    """
+    Runs the homepage scrape, the DDG query angles, the Google News RSS
+    editions and the site's own news feeds concurrently under a single deadline.
+
+    Pass refresh=True to bypass the research cache and fetch everything fresh,
+    and crawl=True to research several high-value pages of the site instead
+    of just the homepage.
+
+    `on_progress` is called with a short status message as each source
+    finishes. It is always invoked from the calling thread, so it is safe to
+    pass Streamlit functions such as `st.write`.
+
+    Returns a research bundle:
+        {
+            'company_name': str,
+            'website_content': str,
+            'news_results': list,
+            'source_status': dict,   # per-source status, see researcher._run_sources
+            'elapsed': float,
+        }
+    """
+    start = time.monotonic()
+    company_name = company_name or extract_company_name(url) or "Target Company"
+    search_name = _resolve_company_name(company_name)
+
+    tasks = {"Website": ('website', scrape_website, (url, refresh, crawl))}
+    if search_name:
+        tasks.update(_news_tasks(search_name, refresh, site_url=url, crawl=crawl))
+
+    if on_progress:
+        on_progress(f"Researching {company_name}: website + {len(tasks) - 1} news sources...")
+
+    def report(name, status, data):
+        if not on_progress:
+            return
+        if name == "Website":
+            on_progress("Website scraped." if data else f"Website unavailable ({status['status']}).")
+        elif status['status'] == 'ok':
+            on_progress(f"{name}: {status['results']} results")
+        else:
+            on_progress(f"{name}: {status['status']}")
+
+    with metrics.span("research", company=company_name) as span:
+        data, statuses = _run_sources(tasks, deadline, on_done=report)
+        if any(s['status'] != 'ok' for s in statuses.values()):
+            span.outcome = "partial"
+
+    if on_progress:
+        on_progress(f"Sources: {summarize_statuses(statuses)}")
+
+    return {
+        'company_name': company_name,
+        'website_content': data.get("Website") or "Website content unavailable.",
+        'news_results': _dedupe_results(_collect_news(tasks, data, statuses)),
+        'source_status': statuses,
+        'elapsed': time.monotonic() - start,
+    }
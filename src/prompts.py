@@ -228,3 +228,87 @@ Your response should contain ONLY the Strategy Guide sections (Metadata line thr
 
 These are for your internal guidance only. Generate output now following the structure above.
 """
+
+# Map stage of the two-stage (map-reduce) mode. These are deliberately
+# independent of the mode and the user's inputs, so the summaries can be
+# cached per chunk and reused when only the final brief changes.
+MAP_WEBSITE_PROMPT = """
+Summarize the following excerpt from {company_name}'s website for an analyst preparing a company brief.
+
+Keep only concrete facts: products and services, target customers and industries, notable clients,
+locations, size, leadership, partnerships, technology, hiring and stated strategy or priorities.
+Write at most 8 short bullet points. Do not add information that is not in the excerpt.
+If the excerpt contains nothing useful (navigation, cookie notices, legal text), reply with "NONE".
+
+EXCERPT:
+{chunk}
+"""
+
+MAP_NEWS_PROMPT = """
+Summarize the following news items about {company_name} for an analyst preparing a company brief.
+
+Write one bullet point per distinct development, starting with the date in [Month Year] format when
+known, followed by what happened and the source link in parentheses. Merge items that describe the
+same event (items about one story are listed next to each other). Skip items that are not about
+{company_name}. Do not add information that is not given.
+
+NEWS ITEMS:
+{chunk}
+"""
+
+COMPARISON_PROMPT = """
+You are a B2B Strategy Expert comparing a target account with its competitors for a sales professional.
+
+TARGET COMPANY: {company_name}
+
+USER'S SOLUTION:
+"{val_prop_context}"
+
+INDIVIDUAL ACCOUNT BRIEFS:
+{briefs_text}
+
+Generate a comparison following this EXACT structure:
+
+# Competitive Landscape: {company_name} vs. {competitor_names}
+
+## 1. Side-by-Side Snapshot
+A markdown table with one row per company and columns: Company, Core Offering, Target Customers, Recent Momentum (one short phrase each).
+
+## 2. Where {company_name} Differs
+3-5 bullet points on how the target's positioning, strategy or recent moves differ from the competitors, citing the specific developments from the briefs.
+
+## 3. Shared Pressures Across the Market
+A short paragraph on trends, challenges or buying signals that appear for several of these companies.
+
+## 4. Angle for the User's Solution
+2-3 bullet points on how to position the user's solution to {company_name} given what its competitors are doing (e.g. a capability a competitor already has, a gap none of them covers).
+
+Use only information from the briefs. Do not include meta-commentary about these instructions.
+"""
+
+DELTA_BRIEF_PROMPT = """
+You are a B2B Strategy Expert updating an existing {report_kind} about {company_name}.
+
+PREVIOUS REPORT (written {previous_date}):
+{previous_report}
+
+EARLIER UPDATES SINCE THAT REPORT:
+{previous_updates}
+
+NEW NEWS SINCE THE LAST UPDATE ({article_count} articles):
+{news_text}
+
+{focus_label}:
+"{focus}"
+
+Write ONLY the update, in this structure:
+
+### New Developments
+One bullet per genuinely new development, starting with the date in [Month Year] format, with the source link in parentheses. Skip anything already covered above.
+
+### What This Changes
+2-4 sentences on how these developments change or reinforce the previous report's conclusions (e.g. new buying signals, shifted priorities, points to raise). Reference the relevant sections of the previous report instead of repeating them.
+
+If none of the new articles adds anything material, reply with exactly: "No material changes."
+Do not rewrite the previous report and do not include meta-commentary about these instructions.
+"""
@@ -0,0 +1,191 @@
+"""
+Process-wide rate limiting for search backends.
+
+Each backend (DuckDuckGo, Google News RSS) gets a token bucket. Its refill
+rate adapts AIMD-style: every success nudges the rate up by a small fixed
+step, and every rate-limit response halves it, so throughput settles just
+below what the backend tolerates. Rate-limited calls are retried with
+exponential backoff and full jitter.
+
+Calls beyond the burst queue for a token. They are only dropped (as
+'throttled', never as 'rate-limited') when the wait would outlast the
+caller's deadline (see set_call_deadline), or max_wait when there is none,
+since the result would arrive too late to be used.
+"""
+import contextvars
+import os
+import random
+import threading
+import time
+
+# Per-backend budgets: starting rate (requests/second), burst size, the
+# bounds the adaptive rate moves between, and the longest a caller may wait
+# when no deadline is set. Bursts cover one full research fan-out for as
+# many companies as run at once (comparison mode and batch.py default to 4):
+# 5 DDG angles and 2 Google News editions per company.
+DEFAULT_BUDGETS = {
+    'ddg': {
+        'rate': float(os.getenv("B2B_DDG_RATE", 1.0)),
+        'burst': int(os.getenv("B2B_DDG_BURST", 20)),
+        'min_rate': 0.1,
+        'max_rate': float(os.getenv("B2B_DDG_MAX_RATE", 3.0)),
+        'max_wait': 12.0,
+    },
+    'rss': {
+        'rate': float(os.getenv("B2B_RSS_RATE", 5.0)),
+        'burst': int(os.getenv("B2B_RSS_BURST", 10)),
+        'min_rate': 0.5,
+        'max_rate': float(os.getenv("B2B_RSS_MAX_RATE", 10.0)),
+        'max_wait': 12.0,
+    },
+}
+FALLBACK_BUDGET = {'rate': 2.0, 'burst': 4, 'min_rate': 0.2, 'max_rate': 5.0, 'max_wait': 12.0}
+
+ADDITIVE_INCREASE = 0.05      # requests/second added per success
+MULTIPLICATIVE_DECREASE = 0.5  # rate multiplier per rate-limit response
+DECREASE_COOLDOWN = 1.0        # a burst of concurrent 429s counts as one decrease
+MAX_RETRIES = 2
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 8.0
+
+
+class RateLimitDropped(Exception):
+    """Raised when a call would wait past its deadline. The backend itself never refused it."""
+
+
+# Monotonic time by which the current research fan-out must finish, if any.
+_deadline = contextvars.ContextVar("rate_limit_deadline", default=None)
+
+
+def set_call_deadline(deadline_at: float):
+    """Sets the time.monotonic() deadline for rate-limited calls made in the current context."""
+    _deadline.set(deadline_at)
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket whose refill rate adapts to rate-limit feedback."""
+
+    def __init__(self, name: str, rate: float, burst: int, min_rate: float, max_rate: float, max_wait: float):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.counts = {'calls': 0, 'delayed': 0, 'retried': 0, 'dropped': 0, 'rate_limited': 0}
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait: float = None) -> float:
+        """
+        Takes a token, sleeping until one is available. Returns the seconds waited.
+        Raises RateLimitDropped if the wait would exceed max_wait (by default the
+        time left before the context's call deadline, else the budget's max_wait).
+        """
+        if max_wait is None:
+            deadline_at = _deadline.get()
+            max_wait = self.max_wait if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                self.counts['dropped'] += 1
+                raise RateLimitDropped(f"{self.name} throttled locally: would wait {wait:.1f}s, {max_wait:.1f}s left")
+            # Reserve the token now (the bucket may go negative) so waiters queue in order
+            self._tokens -= 1
+            self.counts['calls'] += 1
+            if wait > 0:
+                self.counts['delayed'] += 1
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + ADDITIVE_INCREASE)
+
+    def on_retry(self):
+        with self._lock:
+            self.counts['retried'] += 1
+
+    def on_rate_limited(self):
+        with self._lock:
+            self.counts['rate_limited'] += 1
+            now = time.monotonic()
+            if now - self._last_decrease < DECREASE_COOLDOWN:
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * MULTIPLICATIVE_DECREASE)
+            # Drain the bucket so callers already holding burst capacity slow down too
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts, rate=round(self.rate, 3))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(backend: str) -> AdaptiveRateLimiter:
+    """Returns the process-wide limiter for a backend, creating it on first use."""
+    with _limiters_lock:
+        limiter = _limiters.get(backend)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(backend, **DEFAULT_BUDGETS.get(backend, FALLBACK_BUDGET))
+            _limiters[backend] = limiter
+        return limiter
+
+
+def call_with_limits(backend: str, fn, *args, is_rate_limited=None, retries: int = MAX_RETRIES):
+    """
+    Calls fn(*args) under the backend's rate limit. Calls that fail with a
+    rate-limit error (per `is_rate_limited(exc)`) shrink the rate and are
+    retried up to `retries` times with jittered exponential backoff, unless the
+    backoff would run into the context's call deadline; other errors propagate
+    immediately.
+    """
+    limiter = get_limiter(backend)
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            if not (is_rate_limited and is_rate_limited(e)):
+                raise
+            limiter.on_rate_limited()
+            if attempt >= retries:
+                raise
+            delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt + 1)))
+            deadline_at = _deadline.get()
+            if deadline_at is not None and delay >= deadline_at - time.monotonic():
+                # The retry couldn't finish before its result is thrown away
+                raise
+            attempt += 1
+            limiter.on_retry()
+            print(f"{backend} rate limited; retry {attempt}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        limiter.on_success()
+        return result
+
+
+def rate_limit_stats() -> dict:
+    """
+    Per-backend counts plus the current rate: calls, delayed (queued for a token),
+    dropped (throttled locally, never sent), rate_limited (backend answered with a
+    rate-limit error) and retried.
+    """
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
@@ -1,150 +1,687 @@
-import requests
-from bs4 import BeautifulSoup
-from duckduckgo_search import DDGS
-from fake_useragent import UserAgent
 from .utils import extract_company_name
+from .http_client import get_client, connection_stats
+from .extract import extract_text, MAX_PAGE_CHARS
+from .dedup import dedupe_news
+from .feeds import parse_feed, merge_feeds, discover_feeds, ITEMS_PER_FEED, MAX_FEED_BYTES
+from . import metrics
+from .cache import get_cache, normalize_domain_key, normalize_query_key, CACHE_DIR
+from .ratelimit import call_with_limits, set_call_deadline, rate_limit_stats, RateLimitDropped
+import contextvars
+import hashlib
+import os
+import threading
 import time
-# Removed feedparser due to installation issues in some environments
-import xml.etree.ElementTree as ET
+from collections import deque
+from contextlib import contextmanager
 from urllib.parse import quote
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+try:
+    import fcntl
+except ImportError:  # Windows: single-flight stays per-process
+    fcntl = None
 
-def scrape_website(url: str) -> str:
+# Overall budget for the news fan-out (seconds)
+SEARCH_DEADLINE = 12
+
+# Overridable so benchmarks can point at a local stand-in feed
+GOOGLE_NEWS_RSS_URL = os.getenv(
+    "B2B_GOOGLE_NEWS_RSS_URL",
+    "https://news.google.com/rss/search?q={query}&hl={hl}&gl={gl}&ceid={gl}:{lang}"
+)
+# Google News editions fetched concurrently, as language-COUNTRY codes
+GOOGLE_NEWS_LOCALES = [
+    locale.strip() for locale in os.getenv("B2B_GOOGLE_NEWS_LOCALES", "en-US,en-GB").split(",") if locale.strip()
+]
+# Source kinds whose results are feed items, merged newest first before dedup
+FEED_KINDS = ('rss', 'feed')
+
+# Hedging: re-issue a slow source once it exceeds this percentile of its recent latencies
+HEDGE_ENABLED = os.getenv("B2B_HEDGE_SEARCHES", "0") == "1"
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 1.0
+HEDGEABLE_KINDS = ('ddg', 'rss')
+MAX_HEDGES = 2
+LATENCY_HISTORY = 200
+
+_latency_history = {}
+_latency_lock = threading.Lock()
+
+# Single-flight: identical fetches already in progress are shared rather than repeated.
+# Set B2B_SINGLE_FLIGHT_LOCKS=1 to also coalesce across processes on this host via lock files.
+SINGLE_FLIGHT_LOCKS = os.getenv("B2B_SINGLE_FLIGHT_LOCKS", "0") == "1"
+SINGLE_FLIGHT_LOCK_DIR = os.path.join(CACHE_DIR, "locks")
+SINGLE_FLIGHT_LOCK_WAIT = 30
+
+# Set for hedged attempts, which must not coalesce onto the request they are hedging
+_bypass_single_flight = contextvars.ContextVar("b2b_bypass_single_flight", default=False)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller (the leader)
+    runs the fetch and later callers wait on its future, getting the same
+    result or exception.
+
+    With lock files enabled, a leader that finds another process already
+    fetching the same key waits for its lock and then re-reads the cache
+    (via `recheck`) instead of fetching again.
+    """
+
+    def __init__(self, lock_dir: str = None):
+        self.lock_dir = lock_dir
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.coalesced = 0
+        self.cross_process = 0
+
+    def do(self, key: str, fn, recheck=None) -> tuple:
+        """Returns (result, how) where how is 'leader', 'coalesced' or 'coalesced_process'."""
+        if _bypass_single_flight.get():
+            return fn(), 'leader'
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result(), 'coalesced'
+
+        try:
+            with self._process_lock(key) as waited:
+                cached = recheck() if waited and recheck else None
+                if cached is not None:
+                    with self._lock:
+                        self.cross_process += 1
+                    result, how = cached, 'coalesced_process'
+                else:
+                    result, how = fn(), 'leader'
+            future.set_result(result)
+            return result, how
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    @contextmanager
+    def _process_lock(self, key: str):
+        """Holds an exclusive lock file for the key. Yields True if another process held it first."""
+        if not self.lock_dir or fcntl is None:
+            yield False
+            return
+        os.makedirs(self.lock_dir, exist_ok=True)
+        path = os.path.join(self.lock_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".lock")
+        with open(path, "a") as f:
+            waited = False
+            deadline = time.monotonic() + SINGLE_FLIGHT_LOCK_WAIT
+            while True:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    waited = True
+                    if time.monotonic() > deadline:
+                        break  # Give up waiting and fetch ourselves
+                    time.sleep(0.1)
+            try:
+                yield waited
+            finally:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'coalesced': self.coalesced, 'coalesced_process': self.cross_process,
+                    'inflight': len(self._inflight)}
+
+
+_single_flight = SingleFlight(SINGLE_FLIGHT_LOCK_DIR if SINGLE_FLIGHT_LOCKS else None)
+
+
+def single_flight_stats() -> dict:
+    """Counts of requests served by another caller's in-flight fetch (in-process and cross-process)."""
+    return _single_flight.stats()
+
+
+metrics.register_collector("single_flight", single_flight_stats)
+metrics.register_collector("http_connections", connection_stats, label="host")
+metrics.register_collector("search_rate_limit", rate_limit_stats, label="backend")
+
+def scrape_website(url: str, refresh: bool = False, crawl: bool = False) -> str:
     """
     Scrapes the text content from a given URL using a fake user agent.
     Returns the visible text content of the page.
+    With crawl=True, also fetches high-value same-domain pages (about, products,
+    customers, newsroom, careers) and returns their text with source headers.
+    Results are cached per normalized domain; pass refresh=True to bypass the cache.
+    """
+    cache = get_cache()
+    key = normalize_domain_key(url)
+    if crawl:
+        key = "crawl:" + key
+    with metrics.span("scrape", crawl=crawl) as s:
+        if not refresh:
+            cached = cache.get('website', key)
+            if cached is not None:
+                s.outcome = "cache_hit"
+                return cached
+
+        def fetch():
+            if crawl:
+                # Imported here to avoid a circular import (crawler reuses the helpers below)
+                from .crawler import crawl_website, format_pages
+                pages = crawl_website(url)
+                text = format_pages(pages)
+                feeds = pages[0].get('feeds', []) if pages else []
+            else:
+                page = _fetch_website_page(url)
+                text, feeds = page['text'], page['feeds']
+            if text:
+                cache.set('website', key, text)
+                # Feeds the site advertises, read by the newsroom news source
+                cache.set('website', "feeds:" + key, feeds)
+            return text
+
+        text, how = _single_flight.do(
+            "website:" + key, fetch,
+            recheck=None if refresh else lambda: cache.get('website', key)
+        )
+        if how != 'leader':
+            s.outcome = how
+        elif not text:
+            s.outcome = "empty"
+        return text
+
+def _fetch_website_page(url: str) -> dict:
+    """
+    Fetches a page and returns {'text': visible text, 'feeds': advertised RSS/Atom URLs}.
+    Both are empty on failure.
     """
-    ua = UserAgent()
-    headers = {'User-Agent': ua.random}
-    
     try:
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
             
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer"]):
-            script.decompose()
-            
-        text = soup.get_text()
-        
-        # Break into lines and remove leading/trailing space on each
-        lines = (line.strip() for line in text.splitlines())
-        # Break multi-headlines into a line each
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        # Drop blank lines
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        
-        # Truncate content if it's too massive
-        return text[:15000] 
+        return _conditional_get(
+            url, lambda response: {
+                'text': extract_text(response.text, MAX_PAGE_CHARS),
+                'feeds': discover_feeds(response.text, response.url),
+            },
+            kind=f"page:{MAX_PAGE_CHARS}"
+        )
         
     except Exception as e:
         print(f"Error scraping {url}: {e}")
-        return ""
+        return {'text': "", 'feeds': []}
 
-def _perform_search(query: str) -> list:
-    """Helper to run a single DDGS query."""
-    results = []
-    try:
-        ddgs = DDGS()
-        search_gen = ddgs.text(keywords=query, max_results=3) 
-        for r in search_gen:
-            results.append(r)
-    except Exception as e:
-        print(f"Error searching '{query}': {e}")
-    return results
+def _conditional_get(url: str, parse, kind: str, timeout: float = 10, max_bytes: int = None,
+                     headers: dict = None):
+    """
+    GETs a URL and returns parse(response), revalidating against the last copy.
+
+    For responses that carry an ETag or Last-Modified, the validators and the
+    parsed result (not the raw body) are stored. The next fetch of the same URL sends
+    If-None-Match / If-Modified-Since, and a 304 returns the stored parse
+    without downloading or parsing the body again. `kind` names the parse, so
+    the same URL parsed two ways keeps two entries. Raises on HTTP errors.
+    """
+    cache = get_cache()
+    key = f"{kind}:{url}"
+    stored = cache.get('http', key)
+    headers = dict(headers or {})
+    if stored:
+        if stored.get('etag'):
+            headers['If-None-Match'] = stored['etag']
+        if stored.get('last_modified'):
+            headers['If-Modified-Since'] = stored['last_modified']
+
+    response = get_client().get(url, headers=headers, timeout=timeout, max_bytes=max_bytes)
+    span = metrics.current_span()
+    span.add_bytes(len(response.content))
+    if response.status_code == 304 and stored:
+        span.attrs['not_modified'] = True
+        return stored['parsed']
+    response.raise_for_status()
+
+    parsed = parse(response)
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        cache.set('http', key, {
+            'etag': etag,
+            'last_modified': last_modified,
+            'parsed': parsed,
+        })
+    return parsed
+
+def _perform_search(query: str, refresh: bool = False, raise_errors: bool = False) -> list:
+    """
+    Helper to run a single DDGS query (cached per normalized query string).
+    Errors are logged and return [] unless raise_errors=True.
+    """
+    cache = get_cache()
+    key = "ddg:" + normalize_query_key(query)
+    with metrics.span("ddg_query", query=query) as s:
+        if not refresh:
+            cached = cache.get('news', key)
+            if cached is not None:
+                s.outcome = "cache_hit"
+                return cached
+
+        def fetch():
+            results = call_with_limits('ddg', _run_ddg_query, query, is_rate_limited=_is_rate_limited)
+            if results:
+                cache.set('news', key, results)
+            return results
+
+        try:
+            results, how = _single_flight.do(key, fetch, recheck=None if refresh else lambda: cache.get('news', key))
+        except Exception as e:
+            print(f"Error searching '{query}': {e}")
+            s.outcome = _classify_error(e)
+            if raise_errors:
+                raise
+            return []
+        if how != 'leader':
+            s.outcome = how
+        elif not results:
+            s.outcome = "empty"
+        return results
+
+_ddgs_local = threading.local()
+# duckduckgo_search.DDGS, imported on first search (see _ddgs_class); benchmarks replace it with a stub
+DDGS = None
+
+def _ddgs_class():
+    global DDGS
+    if DDGS is None:
+        from duckduckgo_search import DDGS as ddgs_class
+        DDGS = ddgs_class
+    return DDGS
+
+def _get_ddgs():
+    """One DDGS client per thread, reused across queries (it keeps its own HTTP session)."""
+    ddgs_class = _ddgs_class()
+    ddgs = getattr(_ddgs_local, 'ddgs', None)
+    if ddgs is None or not isinstance(ddgs, ddgs_class):
+        ddgs = ddgs_class()
+        _ddgs_local.ddgs = ddgs
+    return ddgs
 
-def _fetch_google_news_rss(company_name: str) -> list:
-    """Helper to fetch Google News RSS using standard libraries."""
+def _run_ddg_query(query: str) -> list:
+    """Runs a single uncached DDGS query. Raises on failure."""
     results = []
-    try:
-        encoded_name = quote(company_name)
-        rss_url = f"https://news.google.com/rss/search?q={encoded_name}&hl=en-US&gl=US&ceid=US:en"
-        
-        ua = UserAgent()
-        headers = {'User-Agent': ua.random}
-        response = requests.get(rss_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        root = ET.fromstring(response.content)
-        
-        # RSS 2.0 structure: channel -> item
-        items = root.findall('./channel/item')
-        
-        # Take top 5 entries
-        for item in items[:5]:
-            title = item.find('title').text if item.find('title') is not None else "No Title"
-            link = item.find('link').text if item.find('link') is not None else ""
-            pubDate = item.find('pubDate').text if item.find('pubDate') is not None else ""
-            description = item.find('description').text if item.find('description') is not None else ""
-            
-            # description in Google News often contains HTML, cleaner to just use title + date
-            # But let's keep basic cleaning if needed or just pass raw. 
-            # Analyzer is robust enough to handle simple HTML tags if present.
-            
-            results.append({
-                'title': title,
-                'href': link, 
-                'body': f"{pubDate} - {title}", # Using title in body as summary often duplicates or is messy in RSS
-                'source': 'Google News RSS'
-            })
-    except Exception as e:
-        print(f"Error fetching Google News RSS for {company_name}: {e}")
+    ddgs = _get_ddgs()
+    search_gen = ddgs.text(keywords=query, max_results=3) 
+    for r in search_gen:
+        results.append(r)
     return results
 
-def search_news(company_identifier: str) -> list:
+def _fetch_google_news_rss(company_name: str, refresh: bool = False, raise_errors: bool = False,
+                           locale: str = None) -> list:
     """
-    Searches DuckDuckGo and Google News RSS in parallel.
-    Angles: General news, Acquisitions, Partnerships, Product Launches, LinkedIn.
-    Deduplicates results.
+    Helper to fetch one Google News RSS edition (cached per normalized company name and locale).
+    Errors are logged and return [] unless raise_errors=True.
     """
-    company_name = company_identifier
-    if '.' in company_identifier or 'http' in company_identifier:
-        company_name = extract_company_name(company_identifier)
-        
-    if not company_name:
+    locale = locale or GOOGLE_NEWS_LOCALES[0]
+    cache = get_cache()
+    key = f"rss:{locale}:" + normalize_query_key(company_name)
+    with metrics.span("rss", locale=locale) as s:
+        if not refresh:
+            cached = cache.get('news', key)
+            if cached is not None:
+                s.outcome = "cache_hit"
+                return cached
+
+        def fetch():
+            results = call_with_limits('rss', _fetch_google_news_rss_uncached, company_name, locale,
+                                       is_rate_limited=_is_rate_limited)
+            if results:
+                cache.set('news', key, results)
+            return results
+
+        try:
+            results, how = _single_flight.do(key, fetch, recheck=None if refresh else lambda: cache.get('news', key))
+        except Exception as e:
+            print(f"Error fetching Google News RSS for {company_name}: {e}")
+            s.outcome = _classify_error(e)
+            if raise_errors:
+                raise
+            return []
+        if how != 'leader':
+            s.outcome = how
+        elif not results:
+            s.outcome = "empty"
+        return results
+
+def _fetch_google_news_rss_uncached(company_name: str, locale: str) -> list:
+    """Fetches one Google News RSS edition (revalidating an unchanged feed). Raises on failure."""
+    encoded_name = quote(company_name)
+    lang, _, country = locale.partition("-")
+    rss_url = GOOGLE_NEWS_RSS_URL.format(query=encoded_name, hl=locale, gl=country.upper() or "US", lang=lang)
+    return _conditional_get(rss_url, lambda response: _parse_google_news_rss(response.content), kind="rss",
+                            max_bytes=MAX_FEED_BYTES)
+
+def _parse_google_news_rss(content: bytes) -> list:
+    """Parses the first items of a Google News RSS document into news result dicts."""
+    # Google's descriptions are HTML link lists, so the title doubles as the summary
+    return parse_feed(content, ITEMS_PER_FEED, source='Google News RSS', with_summary=False)
+
+def _fetch_feed(feed_url: str, refresh: bool = False) -> list:
+    """Fetches and parses one site feed (cached per URL). Raises on failure."""
+    cache = get_cache()
+    key = "feed:" + feed_url
+    with metrics.span("feed", url=feed_url) as s:
+        if not refresh:
+            cached = cache.get('news', key)
+            if cached is not None:
+                s.outcome = "cache_hit"
+                return cached
+
+        def fetch():
+            results = _conditional_get(
+                feed_url, lambda response: parse_feed(response.content, ITEMS_PER_FEED, source='Company newsroom'),
+                kind="feed", max_bytes=MAX_FEED_BYTES,
+            )
+            if results:
+                cache.set('news', key, results)
+            return results
+
+        results, how = _single_flight.do(key, fetch, recheck=None if refresh else lambda: cache.get('news', key))
+        if how != 'leader':
+            s.outcome = how
+        elif not results:
+            s.outcome = "empty"
+        return results
+
+def site_feeds(url: str, crawl: bool = False) -> list:
+    """Feed URLs the site advertised when scrape_website last fetched it, or []."""
+    key = normalize_domain_key(url)
+    return get_cache().get('website', "feeds:" + ("crawl:" + key if crawl else key)) or []
+
+def _fetch_site_feeds(url: str, refresh: bool = False, crawl: bool = False, raise_errors: bool = False) -> list:
+    """
+    Reads the RSS/Atom feeds the company website advertises (e.g. its newsroom).
+
+    Feeds are discovered while the site is scraped; this joins the scrape
+    already in flight for the same site (single-flight) rather than fetching
+    the homepage twice. A site without feeds returns [].
+    """
+    scrape_website(url, refresh, crawl)
+    return _fetch_feeds(site_feeds(url, crawl), refresh, raise_errors)
+
+def _fetch_feeds(feeds: list, refresh: bool = False, raise_errors: bool = False) -> list:
+    """
+    Fetches known feed URLs concurrently and merges them newest first.
+    Errors are logged and return [] unless raise_errors=True.
+    """
+    if not feeds:
         return []
 
-    print(f"Searching news for: {company_name} (Multi-Angle + RSS)")
-    
-    queries = [
+    errors = []
+
+    def fetch(feed_url):
+        try:
+            return _fetch_feed(feed_url, refresh)
+        except Exception as e:
+            print(f"Error fetching feed {feed_url}: {e}")
+            errors.append(e)
+            return []
+
+    with ThreadPoolExecutor(max_workers=len(feeds)) as executor:
+        results = list(executor.map(lambda feed_url: contextvars.copy_context().run(fetch, feed_url), feeds))
+    if raise_errors and len(errors) == len(feeds):
+        raise errors[0]
+    return merge_feeds(results)
+
+def _classify_error(error: Exception) -> str:
+    """
+    Maps a source failure to 'rate-limited' (the backend refused it), 'throttled'
+    (our own limiter dropped it before sending), 'timeout' or 'error'.
+    """
+    if isinstance(error, RateLimitDropped):
+        return 'throttled'
+    name = type(error).__name__.lower()
+    message = str(error).lower()
+    if 'ratelimit' in name or '429' in message or 'rate limit' in message or 'ratelimit' in message:
+        return 'rate-limited'
+    if isinstance(error, TimeoutError) or 'timeout' in name or 'timed out' in message:
+        return 'timeout'
+    return 'error'
+
+def _is_rate_limited(error: Exception) -> bool:
+    return _classify_error(error) == 'rate-limited'
+
+def _record_latency(kind: str, elapsed: float):
+    with _latency_lock:
+        _latency_history.setdefault(kind, deque(maxlen=LATENCY_HISTORY))
+        _latency_history[kind].append(elapsed)
+
+def _hedge_threshold(kind: str):
+    """Returns the latency after which a request of this kind is hedged, or None without enough history."""
+    with _latency_lock:
+        samples = sorted(_latency_history.get(kind, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return max(samples[int(len(samples) * HEDGE_PERCENTILE) - 1], HEDGE_MIN_DELAY)
+
+def _timed_call(fn, args):
+    start = time.monotonic()
+    result = fn(*args)
+    return result, time.monotonic() - start
+
+def _run_sources(tasks: dict, deadline: float, on_done=None, hedge: bool = HEDGE_ENABLED) -> tuple:
+    """
+    Runs source fetches concurrently under one deadline.
+
+    `tasks` maps a source name to (kind, fn, args); fn should raise on failure.
+    Sources still running at the deadline are abandoned. With hedge=True, a
+    hedgeable source that is slower than the recent latency percentile for
+    its kind gets a duplicate request, and whichever finishes first wins.
+    `on_done(name, status, data)` is called from the calling thread as each
+    source settles.
+
+    Returns (data_by_source, status_by_source), where each status is
+    {'status': 'ok' | 'timeout' | 'error' | 'rate-limited' | 'throttled', 'results': int,
+     'elapsed': float, 'error': str or None, 'hedged': bool}.
+    """
+    start = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=len(tasks) + MAX_HEDGES)
+    futures = {}
+    hedged = set()
+    data = {}
+    statuses = {}
+
+    def submit(name, hedge_attempt=False):
+        kind, fn, args = tasks[name]
+        # Run each attempt in a copy of this context so spans keep the caller's run id
+        context = contextvars.copy_context()
+        # Rate-limited calls may queue for a token until the fan-out's deadline, not past it
+        context.run(set_call_deadline, start + deadline)
+        if hedge_attempt:
+            context.run(_bypass_single_flight.set, True)
+        futures[executor.submit(context.run, _timed_call, fn, args)] = name
+
+    for name in tasks:
+        submit(name)
+
+    try:
+        while futures:
+            now = time.monotonic()
+            remaining = deadline - (now - start)
+            if remaining <= 0:
+                break
+
+            timeout = remaining
+            hedge_due = []
+            if hedge and len(hedged) < MAX_HEDGES:
+                for name in set(futures.values()) - hedged:
+                    kind = tasks[name][0]
+                    threshold = _hedge_threshold(kind) if kind in HEDGEABLE_KINDS else None
+                    if threshold is None:
+                        continue
+                    due_in = threshold - (now - start)
+                    if due_in <= 0:
+                        hedge_due.append(name)
+                    else:
+                        timeout = min(timeout, due_in)
+
+            for name in hedge_due[:MAX_HEDGES - len(hedged)]:
+                print(f"Hedging slow source: {name}")
+                hedged.add(name)
+                submit(name, hedge_attempt=True)
+
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures.pop(future)
+                if name in statuses:
+                    continue  # The other attempt already settled this source
+                kind = tasks[name][0]
+                try:
+                    result, elapsed = future.result()
+                except Exception as e:
+                    if name in futures.values():
+                        continue  # A hedged attempt is still running; let it decide
+                    statuses[name] = {
+                        'status': _classify_error(e), 'results': 0,
+                        'elapsed': time.monotonic() - start, 'error': str(e), 'hedged': name in hedged,
+                    }
+                else:
+                    _record_latency(kind, elapsed)
+                    data[name] = result
+                    statuses[name] = {
+                        'status': 'ok', 'results': len(result) if isinstance(result, list) else int(bool(result)),
+                        'elapsed': elapsed, 'error': None, 'hedged': name in hedged,
+                    }
+                # Drop any duplicate attempt still in flight
+                for other, other_name in list(futures.items()):
+                    if other_name == name:
+                        futures.pop(other)
+                        other.cancel()
+                if on_done:
+                    on_done(name, statuses[name], data.get(name))
+
+        for name in tasks:
+            if name not in statuses:
+                statuses[name] = {
+                    'status': 'timeout', 'results': 0, 'elapsed': deadline,
+                    'error': f"No response within {deadline:.0f}s", 'hedged': name in hedged,
+                }
+                if on_done:
+                    on_done(name, statuses[name], None)
+    finally:
+        # Don't block on stragglers; their threads finish in the background.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return data, statuses
+
+def _news_tasks(company_name: str, refresh: bool = False, site_url: str = None, crawl: bool = False,
+                feeds: list = None) -> dict:
+    """
+    Builds the _run_sources task table for the DDG angles, one Google News RSS
+    task per locale and, given the company's site, the feeds it advertises.
+    Known `feeds` are read directly instead of scraping the site to find them.
+    """
+    tasks = {f"DDG: {q}": ('ddg', _perform_search, (q, refresh, True)) for q in _build_queries(company_name)}
+    for i, locale in enumerate(GOOGLE_NEWS_LOCALES):
+        name = "Google News RSS" if i == 0 else f"Google News RSS ({locale})"
+        tasks[name] = ('rss', _fetch_google_news_rss, (company_name, refresh, True, locale))
+    if feeds is not None:
+        if feeds:
+            tasks["Newsroom feeds"] = ('feed', _fetch_feeds, (feeds, refresh, True))
+    elif site_url:
+        tasks["Newsroom feeds"] = ('feed', _fetch_site_feeds, (site_url, refresh, crawl, True))
+    return tasks
+
+def _collect_news(tasks: dict, data: dict, statuses: dict) -> list:
+    """
+    Flattens the news sources' results: feed items from every feed merged
+    newest first (and capped), then the search results.
+    """
+    feeds, searches = [], []
+    for name in statuses:
+        kind = tasks[name][0]
+        if kind == 'website':
+            continue
+        results = data.get(name) or []
+        if kind in FEED_KINDS:
+            feeds.append(results)
+        else:
+            searches.extend(results)
+    return merge_feeds(feeds) + searches
+
+def _build_queries(company_name: str) -> list:
+    """Returns the DDG query angles used for a company."""
+    return [
         f"{company_name} news",
         f"{company_name} recent acquisitions funding",
         f"{company_name} strategic partnership announcement",
         f"{company_name} new product launch",
         f"{company_name} site:linkedin.com/company"
     ]
-    
-    all_results = []
-    
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        # Submit DDG queries
-        future_to_task = {executor.submit(_perform_search, q): f"DDG: {q}" for q in queries}
-        # Submit RSS fetch
-        future_to_task[executor.submit(_fetch_google_news_rss, company_name)] = "Google News RSS"
+
+def _resolve_company_name(company_identifier: str) -> str:
+    """Accepts either a bare company name or a URL/domain and returns the name."""
+    if '.' in company_identifier or 'http' in company_identifier:
+        return extract_company_name(company_identifier)
+    return company_identifier
+
+def search_news(company_identifier: str, refresh: bool = False, site_url: str = None) -> list:
+    """
+    Searches DuckDuckGo and Google News RSS in parallel.
+    Angles: General news, Acquisitions, Partnerships, Product Launches, LinkedIn.
+    Deduplicates results. Pass refresh=True to bypass the research cache, and
+    the company's site_url to read the news feeds it advertises too.
+    """
+    return search_news_with_status(company_identifier, refresh=refresh, site_url=site_url)[0]
+
+def search_news_with_status(
+    company_identifier: str,
+    refresh: bool = False,
+    deadline: float = SEARCH_DEADLINE,
+    hedge: bool = HEDGE_ENABLED,
+    site_url: str = None,
+    crawl: bool = False,
+    feeds: list = None
+) -> tuple:
+    """
+    Like search_news, but bounded by `deadline` seconds: sources that haven't
+    answered by then are abandoned and whatever has arrived is returned.
+    Pass `feeds` (from site_feeds) to read those feeds without re-scraping the site.
+    Returns (deduped_results, status_by_source).
+    """
+    company_name = _resolve_company_name(company_identifier)
         
-        for future in as_completed(future_to_task):
-            task_name = future_to_task[future]
-            try:
-                data = future.result()
-                all_results.extend(data)
-            except Exception as e:
-                print(f"Task {task_name} failed: {e}")
-
-    # Deduplication based on URL
-    unique_links = set()
-    deduped_results = []
+    if not company_name:
+        return [], {}
+
+    print(f"Searching news for: {company_name} (Multi-Angle + RSS)")
     
-    for item in all_results:
-        link = item.get('href', item.get('link', ''))
-        # Simple normalization to catch http vs https dupes if necessary, but exact match is usually fine for this scope
-        
-        if link and link not in unique_links:
-            unique_links.add(link)
-            deduped_results.append(item)
-            
-    return deduped_results
+    # Given a URL, the site's own feeds are read too
+    if site_url is None and company_name != company_identifier:
+        site_url = company_identifier
+    tasks = _news_tasks(company_name, refresh, site_url=site_url, crawl=crawl, feeds=feeds)
+    data, statuses = _run_sources(tasks, deadline, hedge=hedge)
+
+    for name in statuses:
+        if statuses[name]['status'] != 'ok':
+            print(f"Task {name}: {statuses[name]['status']} ({statuses[name]['error']})")
+
+    return _dedupe_results(_collect_news(tasks, data, statuses)), statuses
+
+def summarize_statuses(statuses: dict) -> str:
+    """E.g. '5 ok, 1 timeout' for display in the UI."""
+    counts = {}
+    for status in statuses.values():
+        counts[status['status']] = counts.get(status['status'], 0) + 1
+    return ", ".join(f"{n} {label}" for label, n in sorted(counts.items(), key=lambda kv: kv[0] != 'ok'))
+
+def _dedupe_results(all_results: list) -> list:
+    """Collapses exact and near-duplicate articles (syndicated copies, redirect and tracking variants)."""
+    return dedupe_news(all_results)
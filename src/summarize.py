@@ -0,0 +1,177 @@
+"""
+Map stage of the two-stage (map-reduce) brief.
+
+Website text is split into large chunks and news items are grouped by story
+and packed into small clusters; each is summarized by a cheaper model, several at a time. The summaries
+then stand in for the raw research in the usual Sales / Interview prompt
+(the reduce step, see analyzer.generate_brief). Map summaries are cached by
+a hash of the rendered map prompt, so re-running with a different mode or
+value proposition only pays for the final call.
+"""
+import contextvars
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.prompts import MAP_WEBSITE_PROMPT, MAP_NEWS_PROMPT
+from src.context import chunk_text, count_tokens, format_news_item
+from src.cache import get_cache
+from src.dedup import topic_terms
+from src import metrics
+
+MAP_MODEL = os.getenv("B2B_MAP_MODEL", "gpt-4o-mini")
+MAP_CONCURRENCY = int(os.getenv("B2B_MAP_CONCURRENCY", 4))
+MAP_TEMPERATURE = 0.0
+MAP_MAX_TOKENS = 400
+
+# Website tokens per map call, and news items per cluster.
+MAP_CHUNK_TOKENS = 1500
+NEWS_PER_CLUSTER = 8
+
+# Two articles are about the same story when they share at least TOPIC_MIN_SHARED
+# distinctive words, making up TOPIC_OVERLAP of the shorter one's (see dedup.topic_terms).
+TOPIC_MIN_SHARED = 2
+TOPIC_OVERLAP = 0.4
+
+# Kept from a chunk when its map call fails, so the brief still sees something.
+FALLBACK_CHARS = 1500
+
+MAP_SYSTEM_MESSAGE = "You are a precise research assistant. You summarize faithfully and concisely."
+
+
+def _same_story(a: set, b: set) -> bool:
+    shared = len(a & b)
+    return shared >= TOPIC_MIN_SHARED and shared >= TOPIC_OVERLAP * min(len(a), len(b))
+
+
+def news_clusters(news_results: list, size: int = NEWS_PER_CLUSTER, company_name: str = "") -> list:
+    """
+    Groups news items by story, then packs whole stories into clusters of at
+    most `size` items, one per map call. An item joins the first story with a
+    member it overlaps (see _same_story), so follow-ups and re-reports of an
+    event are summarized together; a story is only split when larger than `size`.
+    Stories keep the order of their first item.
+    """
+    exclude = topic_terms({'title': company_name})
+    stories = []
+    for item in news_results:
+        terms = topic_terms(item, exclude)
+        for members, member_terms in stories:
+            if any(_same_story(terms, other) for other in member_terms):
+                members.append(item)
+                member_terms.append(terms)
+                break
+        else:
+            stories.append(([item], [terms]))
+
+    clusters, current = [], []
+    for members, _ in stories:
+        for start in range(0, len(members), size):
+            part = members[start:start + size]
+            if current and len(current) + len(part) > size:
+                clusters.append(current)
+                current = []
+            current = current + part
+    if current:
+        clusters.append(current)
+    return clusters
+
+
+def _map_cache_key(prompt: str) -> str:
+    payload = json.dumps([MAP_MODEL, MAP_SYSTEM_MESSAGE, prompt, MAP_TEMPERATURE, MAP_MAX_TOKENS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _summarize(client, kind: str, prompt: str, fallback: str) -> tuple:
+    """Runs one map call (or reads it from the cache). Returns (summary, cached)."""
+    cache = get_cache("llm")
+    key = _map_cache_key(prompt)
+    cached = cache.get('llm_map', key)
+    if cached is not None:
+        metrics.record("map_call", 0.0, outcome="cache_hit", kind=kind, model=MAP_MODEL)
+        return cached['content'], True
+
+    try:
+        with metrics.span("map_call", kind=kind, model=MAP_MODEL) as span:
+            response = client.chat.completions.create(
+                model=MAP_MODEL,
+                messages=[
+                    {"role": "system", "content": MAP_SYSTEM_MESSAGE},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=MAP_TEMPERATURE,
+                max_tokens=MAP_MAX_TOKENS
+            )
+            if response.usage:
+                span.set_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
+        content = (response.choices[0].message.content or "").strip()
+    except Exception as e:
+        print(f"Map summary failed ({kind}): {e}")
+        return fallback[:FALLBACK_CHARS], False
+
+    cache.set('llm_map', key, {'content': content})
+    return content, False
+
+
+def map_research(client, company_name: str, website_content: str, news_results: list, on_progress=None) -> dict:
+    """
+    Summarizes website chunks and news clusters in parallel (at most
+    MAP_CONCURRENCY calls in flight).
+
+    Returns:
+        {
+            'website_content': str,   # website summaries, in page order
+            'news_results': list,     # one digest item per news cluster
+            'calls': int,             # map summaries needed
+            'cached': int,            # of which served from the cache
+            'input_tokens': int,      # research tokens before summarizing
+            'output_tokens': int,     # summary tokens handed to the reduce step
+        }
+    """
+    # Nothing to summarize when the scrape failed; keep the sentinel so the brief reports it
+    scraped = bool(website_content) and len(website_content) > 100 and "unavailable" not in website_content
+    chunks = chunk_text(website_content, max_tokens=MAP_CHUNK_TOKENS) if scraped else []
+    clusters = news_clusters(news_results or [], company_name=company_name)
+
+    jobs = [('website', MAP_WEBSITE_PROMPT.format(company_name=company_name, chunk=chunk), chunk) for chunk in chunks]
+    for cluster in clusters:
+        text = "\n".join(format_news_item(item) for item in cluster)
+        jobs.append(('news', MAP_NEWS_PROMPT.format(company_name=company_name, chunk=text), text))
+
+    if on_progress:
+        on_progress(f"Summarizing {len(chunks)} website chunks and {len(clusters)} news clusters with {MAP_MODEL}...")
+
+    with metrics.span("map_stage", model=MAP_MODEL) as span:
+        with ThreadPoolExecutor(max_workers=max(1, MAP_CONCURRENCY)) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, _summarize, client, kind, prompt, fallback)
+                for kind, prompt, fallback in jobs
+            ]
+            results = [f.result() for f in futures]
+        cached = sum(1 for _, hit in results if hit)
+        if jobs and cached == len(jobs):
+            span.outcome = "cache_hit"
+
+    website_summaries = [
+        summary for (kind, _, _), (summary, _) in zip(jobs, results)
+        if kind == 'website' and summary and summary.strip().upper() != "NONE"
+    ]
+    news_summaries = [summary for (kind, _, _), (summary, _) in zip(jobs, results) if kind == 'news']
+    digests = [
+        {'title': f"News digest {i + 1}", 'body': summary, 'href': '', 'articles': len(cluster)}
+        for i, (cluster, summary) in enumerate(zip(clusters, news_summaries)) if summary
+    ]
+
+    summarized = {
+        'website_content': "\n\n".join(website_summaries) if scraped else (website_content or "Website content unavailable."),
+        'news_results': digests,
+        'calls': len(jobs),
+        'cached': cached,
+        'input_tokens': count_tokens(website_content) + sum(count_tokens(j[2]) for j in jobs if j[0] == 'news'),
+        'output_tokens': sum(count_tokens(s) for s, _ in results),
+    }
+    if on_progress:
+        on_progress(f"Map stage: {len(jobs)} summaries ({cached} cached), "
+                    f"{summarized['input_tokens']:,} -> {summarized['output_tokens']:,} tokens")
+    return summarized
@@ -0,0 +1,100 @@
+"""
+Background warm-up of the heavy dependencies.
+
+The SDKs and parsers (openai, duckduckgo_search, bs4, lxml, PyPDF2) are
+imported on first use so the app paints quickly. Starting the warm-up once
+the UI has rendered loads them, the user agent data set, the tokenizer and
+the shared clients in a daemon thread, so the first brief doesn't pay for
+them either. Every step is best-effort: a failure is logged and skipped,
+and the real call site will retry (and report) it.
+"""
+import os
+import threading
+import time
+
+# Set B2B_WARMUP=0 to skip the warm-up (everything is still loaded on first use).
+WARMUP_ENABLED = os.getenv("B2B_WARMUP", "1") == "1"
+
+_started = False
+_lock = threading.Lock()
+_timings = {}
+
+
+def _import_openai():
+    import openai  # noqa: F401
+
+
+def _openai_client():
+    api_key = os.getenv("OPENAI_API_KEY")
+    if api_key:
+        from .analyzer import _get_client
+        _get_client(api_key)
+
+
+def _http_client():
+    # Loads the fake_useragent data set and mounts the pooled session
+    from .http_client import get_client
+    get_client()
+
+
+def _ddgs():
+    from .researcher import _ddgs_class
+    _ddgs_class()
+
+
+def _parsers():
+    from .extract import _lxml_etree
+    _lxml_etree()
+    import bs4  # noqa: F401
+
+
+def _pdf():
+    import PyPDF2  # noqa: F401
+
+
+def _tokenizer():
+    from .analyzer import MODEL
+    from .context import _get_encoder
+    _get_encoder(MODEL)
+
+
+# Ordered by what the first brief needs soonest
+STEPS = [
+    ("http_client", _http_client),
+    ("parsers", _parsers),
+    ("ddgs", _ddgs),
+    ("openai", _import_openai),
+    ("openai_client", _openai_client),
+    ("tokenizer", _tokenizer),
+    ("pdf", _pdf),
+]
+
+
+def warm_up() -> dict:
+    """Runs every warm-up step in order and returns the seconds each took."""
+    for name, step in STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {e}")
+        _timings[name] = time.perf_counter() - start
+    return dict(_timings)
+
+
+def start_warmup() -> bool:
+    """Starts the warm-up in a daemon thread, once per process. Returns True if this call started it."""
+    global _started
+    if not WARMUP_ENABLED:
+        return False
+    with _lock:
+        if _started:
+            return False
+        _started = True
+    threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+    return True
+
+
+def warmup_stats() -> dict:
+    """Seconds taken by each warm-up step that has finished so far."""
+    return dict(_timings)
@@ -0,0 +1,53 @@
+"""
+Background worker: runs queued research + brief jobs submitted by the app.
+
+Usage:
+    python worker.py --workers 2
+
+Each worker is a separate process polling the SQLite job queue
+(src/jobs.py). The app starts a pair of workers automatically when none
+are alive (see B2B_AUTOSTART_WORKERS); run this directly to manage them
+yourself, e.g. under a process supervisor.
+"""
+import argparse
+import multiprocessing
+import signal
+from dotenv import load_dotenv
+
+from src.jobs import worker_loop
+from src.warmup import start_warmup
+
+
+def _run(poll_interval: float, idle_exit: float):
+    load_dotenv()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent handles Ctrl+C
+    start_warmup()  # Load the SDKs while waiting for the first job
+    worker_loop(poll_interval=poll_interval, idle_exit=idle_exit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2, help="Number of worker processes")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between queue polls when idle")
+    parser.add_argument("--idle-exit", type=float, default=None, help="Exit after this many idle seconds")
+    args = parser.parse_args()
+
+    processes = [
+        multiprocessing.Process(target=_run, args=(args.poll, args.idle_exit), name=f"worker-{i}")
+        for i in range(max(1, args.workers))
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("Stopping workers...")
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()